@@ -0,0 +1,127 @@
+from abc import ABC, abstractmethod
+
+
+class AllocationPolicy(ABC):
+    """Abstract base class for deciding which locations fulfil each line of an order."""
+
+    def allocate(self, shopping_list: list) -> list:
+        """Returns one allocation per (product, quantity) line of the shopping list, in cart order.
+        An allocation maps locations to the quantity drawn there, or is None for products
+        that are not stocked by location. Raises before anything is allocated if a
+        product's total demand in the cart exceeds its stock.
+        """
+        allocations = [None] * len(shopping_list)
+        stock = {}
+        demand = {}
+        lines = []
+        for idx, (product, quantity) in enumerate(shopping_list):
+            if quantity <= 0:
+                continue
+            if product not in stock:
+                stock[product] = product.locations
+            if not stock[product]:
+                continue
+            demand[product] = demand.get(product, 0) + quantity
+            lines.append((idx, product, quantity))
+
+        for product, quantity in demand.items():
+            available = sum(stock[product].values())
+            if quantity > available:
+                raise ValueError(f"Insufficient stock to complete the purchase. Available: {available}")
+
+        self._allocate_lines(lines, stock, demand, allocations)
+        return allocations
+
+    @abstractmethod
+    def _allocate_lines(self, lines: list, stock: dict, demand: dict, allocations: list):
+        """Fills allocations for the (index, product, quantity) lines, drawing down the stock copies."""
+        pass
+
+
+def _draw(available: dict, quantity: int, locations) -> dict:
+    """Draws a quantity from the available stock, visiting locations in the given order."""
+    allocation = {}
+    for location in locations:
+        drawn = min(available[location], quantity)
+        if drawn:
+            allocation[location] = drawn
+            available[location] -= drawn
+            quantity -= drawn
+            if quantity == 0:
+                break
+    return allocation
+
+
+class PriorityOrder(AllocationPolicy):
+    """Draws each line from locations in a fixed priority order.
+    Locations missing from the priorities follow in the order they were added to the product.
+    """
+
+    def __init__(self, priorities: list = None):
+        self.priorities = list(priorities or [])
+
+    def _allocate_lines(self, lines, stock, demand, allocations):
+        rank = {location: idx for idx, location in enumerate(self.priorities)}
+        ordered = {}
+        for idx, product, quantity in lines:
+            if product not in ordered:
+                ordered[product] = sorted(stock[product], key=lambda location: rank.get(location, len(rank)))
+            allocations[idx] = _draw(stock[product], quantity, ordered[product])
+
+
+class LargestStockFirst(AllocationPolicy):
+    """Draws each line from whichever location currently holds the most stock of the product."""
+
+    def _allocate_lines(self, lines, stock, demand, allocations):
+        for idx, product, quantity in lines:
+            available = stock[product]
+            allocation = {}
+            while quantity:
+                location = max(available, key=available.get)
+                drawn = min(available[location], quantity)
+                allocation[location] = allocation.get(location, 0) + drawn
+                available[location] -= drawn
+                quantity -= drawn
+            allocations[idx] = allocation
+
+
+class FewestSplits(AllocationPolicy):
+    """Ships the whole cart from as few locations as possible.
+    Uses the greedy set-cover heuristic: repeatedly pick the location able to supply the
+    most outstanding units, so a cart that fits in one location always ships from one.
+    """
+
+    def _allocate_lines(self, lines, stock, demand, allocations):
+        outstanding = dict(demand)
+        stocked_at = {}
+        scores = {}
+        for product, quantity in outstanding.items():
+            for location, available in stock[product].items():
+                if available > 0:
+                    stocked_at.setdefault(location, []).append(product)
+                    scores[location] = scores.get(location, 0) + min(available, quantity)
+
+        # Scores are kept up to date incrementally: only the locations stocking a
+        # product that was just drawn need adjusting.
+        drawn = {product: {} for product in outstanding}
+        while outstanding:
+            best_location = max(scores, key=scores.get)
+            del scores[best_location]
+            for product in stocked_at.pop(best_location):
+                if product not in outstanding:
+                    continue
+                before = outstanding[product]
+                taken = min(stock[product][best_location], before)
+                drawn[product][best_location] = taken
+                stock[product][best_location] -= taken
+                after = before - taken
+                for location, available in stock[product].items():
+                    if available > after and location in scores:
+                        scores[location] -= (available if available < before else before) - after
+                if after:
+                    outstanding[product] = after
+                else:
+                    del outstanding[product]
+
+        for idx, product, quantity in lines:
+            allocations[idx] = _draw(drawn[product], quantity, list(drawn[product]))
@@ -0,0 +1,43 @@
+"""Measures the cost of allocating a cart across locations.
+
+Run from the project root with: python -m benchmarks.bench_allocation
+"""
+import random
+import timeit
+
+from allocation import PriorityOrder, LargestStockFirst, FewestSplits
+from products import Product
+
+CART_SIZES = (10, 100, 1000)
+LOCATION_COUNTS = (4, 16, 64)
+POLICIES = {
+    "priority": PriorityOrder(),
+    "largest": LargestStockFirst(),
+    "fewest-splits": FewestSplits(),
+}
+
+
+def build_cart(cart_size: int, location_count: int, rng: random.Random) -> list:
+    """Builds a cart of distinct products, each stocked unevenly across the locations."""
+    shopping_list = []
+    for idx in range(cart_size):
+        locations = {f"L{loc}": rng.randint(0, 20) for loc in range(location_count)}
+        product = Product(f"Product {idx}", price=10, quantity=sum(locations.values()), locations=locations)
+        shopping_list.append((product, rng.randint(1, max(1, product.quantity // 2))))
+    return shopping_list
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'policy':<15}{'cart':>8}{'locations':>11}{'ms/alloc':>12}")
+    for cart_size in CART_SIZES:
+        for location_count in LOCATION_COUNTS:
+            shopping_list = build_cart(cart_size, location_count, rng)
+            for name, policy in POLICIES.items():
+                runs = max(1, 2000 // cart_size)
+                seconds = timeit.timeit(lambda: policy.allocate(shopping_list), number=runs)
+                print(f"{name:<15}{cart_size:>8}{location_count:>11}{seconds / runs * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
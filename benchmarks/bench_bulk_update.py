@@ -0,0 +1,109 @@
+"""Compares Store.bulk_update() with the per-setter loop it replaces.
+
+Both approaches apply the same stream of 100k changes to a fresh store with the
+same products. The stream is held as one column of (product, value) pairs per
+field, in the order the changes were made. The "setters" row applies the pairs
+one at a time through the validating setters; the "bulk_update" row passes the
+same columns to bulk_update(), which collapses them itself, so nothing is grouped
+outside the timing. Both rows include publishing the result to the catalog, and
+the benchmark checks that both leave the catalog in the same state.
+
+Run from the project root with: python -m benchmarks.bench_bulk_update
+"""
+import gc
+import random
+import time
+
+from products import Product
+from promotions import PercentageDiscount
+from store import Store
+
+PRODUCT_COUNT = 10_000
+UPDATE_COUNT = 100_000
+
+
+def build_changes(product_count: int, seed: int) -> dict:
+    """Builds a random stream of repricing, restocking, promotion and activation changes,
+    as bulk_update() keyword arguments mapping each field to its (product index, value) pairs."""
+    rng = random.Random(seed)
+    discount = PercentageDiscount("10% off!", discount_percentage=10)
+    changes = {"prices": [], "quantity_deltas": [], "promotions": [], "active": []}
+    for _ in range(UPDATE_COUNT):
+        idx = rng.randrange(product_count)
+        kind = rng.random()
+        if kind < 0.4:
+            changes["prices"].append((idx, rng.randint(1, 2000)))
+        elif kind < 0.8:
+            changes["quantity_deltas"].append((idx, rng.randint(1, 50)))
+        elif kind < 0.9:
+            changes["promotions"].append((idx, discount if rng.random() < 0.8 else None))
+        else:
+            changes["active"].append((idx, rng.random() < 0.8))
+    return changes
+
+
+def fresh(changes: dict):
+    """Returns a new store and the change stream bound to its products."""
+    product_list = [Product(f"Product {idx}", price=100, quantity=100) for idx in range(PRODUCT_COUNT)]
+    bound = {field: [(product_list[idx], value) for idx, value in pairs] for field, pairs in changes.items()}
+    return Store(product_list), bound
+
+
+def apply_with_setters(changes: dict):
+    """Applies the changes one at a time through the validating setters."""
+    for product, price in changes["prices"]:
+        product.price = price
+    for product, delta in changes["quantity_deltas"]:
+        product.quantity += delta
+    for product, promotion in changes["promotions"]:
+        product.promotion = promotion
+    for product, flag in changes["active"]:
+        if flag:
+            product.activate()
+        else:
+            product.deactivate()
+
+
+def timed(label: str, prepare, repeats: int = 5):
+    """Runs a freshly prepared copy of the action several times, reports the best time and returns it with the last store."""
+    best = float("inf")
+    for _ in range(repeats):
+        store_obj, run = prepare()
+        # Like timeit, keep the cyclic garbage collector from landing in the middle of one run but not another.
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - started)
+        finally:
+            gc.enable()
+    print(f"{label:<22}{best * 1000:>10.1f} ms")
+    return best, store_obj
+
+
+def state_of(store_obj: Store) -> list:
+    """Returns the published state of every product, without the product objects themselves."""
+    return [tuple(record[2:7]) for record in store_obj.snapshot()]
+
+
+def main():
+    changes = build_changes(PRODUCT_COUNT, seed=42)
+    print(f"{UPDATE_COUNT} changes over {PRODUCT_COUNT} products")
+
+    def setters():
+        store_obj, bound = fresh(changes)
+        return store_obj, lambda: apply_with_setters(bound)
+
+    def bulk():
+        store_obj, bound = fresh(changes)
+        return store_obj, lambda: store_obj.bulk_update(**bound)
+
+    baseline, by_setters = timed("setters", setters)
+    elapsed, by_bulk = timed("bulk_update", bulk)
+    assert state_of(by_bulk) == state_of(by_setters), "bulk_update() and the setters disagree"
+    print(f"{'':<22}{baseline / elapsed:>10.1f}x the speed of the setters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measures checkout throughput against the number of worker processes
+sharing one SharedStockPool.
+
+Run from the project root with: python -m benchmarks.bench_shared_inventory
+"""
+import multiprocessing
+import os
+import random
+import time
+
+from products import Product
+from shared_inventory import SharedStockPool
+from store import Store
+
+PRODUCT_COUNT = 64
+ORDERS_PER_WORKER = 20_000
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def checkout_worker(product_list, orders: int, seed: int, ready):
+    """Places single-line orders against the shared stock once every worker is ready."""
+    rng = random.Random(seed)
+    store_obj = Store(product_list)
+    ready.wait()
+    for _ in range(orders):
+        store_obj.order([(rng.choice(product_list), rng.randint(1, 3))])
+
+
+def run(ctx, worker_count: int) -> float:
+    """Returns the orders per second achieved by the given number of workers."""
+    with SharedStockPool(capacity=PRODUCT_COUNT, ctx=ctx) as pool:
+        product_list = [Product(f"Product {idx}", price=10, quantity=10 ** 9) for idx in range(PRODUCT_COUNT)]
+        for product in product_list:
+            pool.bind(product)
+
+        ready = ctx.Barrier(worker_count + 1)
+        workers = [ctx.Process(target=checkout_worker, args=(product_list, ORDERS_PER_WORKER, seed, ready))
+                   for seed in range(worker_count)]
+        for worker in workers:
+            worker.start()
+        ready.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        sold = sum(10 ** 9 - product.quantity for product in product_list)
+        assert sold > 0
+        for product in product_list:
+            pool.unbind(product)
+    return worker_count * ORDERS_PER_WORKER / elapsed
+
+
+def main():
+    ctx = multiprocessing.get_context()
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'orders/s':>12}{'speed-up':>10}")
+    baseline = None
+    for worker_count in WORKER_COUNTS:
+        throughput = run(ctx, worker_count)
+        baseline = baseline or throughput
+        print(f"{worker_count:>8}{throughput:>12.0f}{throughput / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
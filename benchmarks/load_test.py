@@ -0,0 +1,118 @@
+"""Load-tests the HTTP store service over keep-alive connections.
+
+Starts a service in-process on a free port (or targets --host/--port of a running one)
+and drives it with concurrent clients sending a mix of listing, lookup, single-order
+and batch-order requests.
+
+Run from the project root with: python -m benchmarks.load_test
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from products import Product
+from store import Store
+from store_service import StoreService
+
+
+def build_store(product_count: int) -> Store:
+    """Builds a store with enough stock that the load test never runs out."""
+    return Store([Product(f"Product {idx}", price=10 + idx, quantity=10 ** 9) for idx in range(product_count)])
+
+
+async def request(reader, writer, method: str, path: str, payload=None):
+    """Sends one keep-alive request and returns the response status."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: load\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, product_ids: list, requests_per_client: int, batch_size: int,
+                 latencies: list, rejected: list):
+    """Runs one client over a single keep-alive connection.
+    Orders rejected by the store (409, e.g. out of stock) are counted rather than treated as failures."""
+    rng = random.Random()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests_per_client):
+            kind = rng.random()
+            cart = {"items": [{"product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+                              for _ in range(rng.randint(1, 5))]}
+            started = time.perf_counter()
+            if kind < 0.3:
+                status = await request(reader, writer, "GET", f"/products?offset={rng.randint(0, 50)}&limit=20")
+            elif kind < 0.5:
+                status = await request(reader, writer, "GET", f"/products/{rng.choice(product_ids)}")
+            elif kind < 0.9:
+                status = await request(reader, writer, "POST", "/orders", cart)
+            else:
+                status = await request(reader, writer, "POST", "/orders/batch", {"carts": [cart] * batch_size})
+            latencies.append(time.perf_counter() - started)
+            if status == 409:
+                rejected.append(status)
+            elif status != 200:
+                raise RuntimeError(f"Unexpected status {status}")
+    finally:
+        writer.close()
+
+
+async def run(args):
+    service = None
+    product_ids = None
+    host, port = args.host, args.port
+    if port is None:
+        store_obj = build_store(args.products)
+        product_ids = [product.product_id for product in store_obj.products_list]
+        service = await StoreService(store_obj, port=0, max_workers=args.workers).start()
+        host, port = "127.0.0.1", service.port
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"GET /products?limit=100 HTTP/1.1\r\nHost: load\r\nConnection: close\r\n\r\n")
+        raw = await reader.read()
+        product_ids = [product["id"] for product in json.loads(raw.split(b"\r\n\r\n", 1)[1])["products"]]
+
+    latencies = []
+    rejected = []
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            client(host, port, product_ids, args.requests, args.batch_size, latencies, rejected) for _ in range(args.clients)
+        ))
+    finally:
+        if service is not None:
+            await service.close()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} req/s), {len(rejected)} orders rejected")
+    print(f"latency ms: p50={statistics.median(latencies) * 1000:.2f} "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.2f} "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the HTTP store service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Target a running service instead of an in-process one.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client.")
+    parser.add_argument("--batch-size", type=int, default=20, help="Carts per batch-order request.")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from collections import namedtuple
+from operator import attrgetter
+from types import MappingProxyType
+
+import products
+
+CHUNK_SIZE = 32
+
+
+class ProductRecord(namedtuple(
+    "ProductRecord",
+    ["product", "product_id", "name", "price", "quantity", "active", "promotion", "locations"],
+)):
+    """An immutable view of a product's state as of one catalog version."""
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        """Returns the product's formatted representation as of this record."""
+        return self.product._describe(self.price, self.quantity, self.active, self.promotion)
+
+
+_NO_LOCATIONS = MappingProxyType({})
+_record_fields = attrgetter("product_id", "name", "price", "quantity", "active", "promotion")
+
+
+def record_for(product) -> ProductRecord:
+    """Captures the current state of a product as an immutable record."""
+    locations = product.locations
+    # tuple.__new__ skips the generated ProductRecord constructor, which matters when publishing thousands of records.
+    return tuple.__new__(ProductRecord, (product, *_record_fields(product),
+                                         MappingProxyType(locations) if locations else _NO_LOCATIONS))
+
+
+def _counted_quantity(record: ProductRecord) -> int:
+    """Returns the quantity a record contributes to the store total, which excludes AddOns."""
+    return 0 if isinstance(record.product, products.AddOns) else record.quantity
+
+
+class CatalogSnapshot:
+    """An immutable, versioned view of every product in a store.
+
+    Records are stored in fixed-size chunks. A new version copies only the chunks
+    holding changed records and shares the rest with the previous version, so
+    publishing after an order costs O(n / CHUNK_SIZE + changes) rather than O(n).
+    Snapshots are never modified once published, so readers need no locks, and a
+    version is freed as soon as no reader holds a reference to it.
+    """
+
+    def __init__(self, version: int, chunks: tuple, length: int, total_quantity: int, positions: dict):
+        """Initializes a snapshot; use build() or the updated()/appended() methods instead."""
+        self._version = version
+        self._chunks = chunks
+        self._length = length
+        self._total_quantity = total_quantity
+        # Maps product ids to positions. The store only ever adds entries past the end
+        # of existing snapshots, so the dict is shared between versions.
+        self._positions = positions
+
+    @classmethod
+    def build(cls, product_list: list, version: int = 0):
+        """Builds a snapshot of the given products from scratch."""
+        records = [record_for(product) for product in product_list]
+        chunks = tuple(tuple(records[idx:idx + CHUNK_SIZE]) for idx in range(0, len(records), CHUNK_SIZE))
+        positions = {record.product_id: idx for idx, record in enumerate(records)}
+        total_quantity = sum(_counted_quantity(record) for record in records)
+        return cls(version, chunks, len(records), total_quantity, positions)
+
+    @property
+    def version(self) -> int:
+        """Returns the version number of the snapshot."""
+        return self._version
+
+    def updated(self, changed_products) -> "CatalogSnapshot":
+        """Returns the next version with fresh records for the given products, sharing untouched chunks."""
+        chunks = list(self._chunks)
+        copied = {}
+        positions = self._positions
+        length = self._length
+        total_quantity = self._total_quantity
+        for record in map(record_for, changed_products):
+            idx = positions.get(record.product_id, length)
+            if idx >= length:
+                continue
+            chunk_idx, offset = divmod(idx, CHUNK_SIZE)
+            chunk = copied.get(chunk_idx)
+            if chunk is None:
+                chunk = copied[chunk_idx] = list(chunks[chunk_idx])
+            # AddOns always hold a quantity of 1, so the difference is 0 for them as the total requires.
+            total_quantity += record.quantity - chunk[offset].quantity
+            chunk[offset] = record
+        for chunk_idx, chunk in copied.items():
+            chunks[chunk_idx] = tuple(chunk)
+        return CatalogSnapshot(self._version + 1, tuple(chunks), length, total_quantity, positions)
+
+    def appended(self, product) -> "CatalogSnapshot":
+        """Returns the next version with a product added at the end."""
+        record = record_for(product)
+        chunks = list(self._chunks)
+        if self._length % CHUNK_SIZE:
+            chunks[-1] = chunks[-1] + (record,)
+        else:
+            chunks.append((record,))
+        self._positions[record.product_id] = self._length
+        return CatalogSnapshot(self._version + 1, tuple(chunks), self._length + 1,
+                               self._total_quantity + _counted_quantity(record), self._positions)
+
+    def _position_of(self, product_id: int):
+        """Returns the position of a product in this snapshot, or None if it is not part of it."""
+        idx = self._positions.get(product_id)
+        return idx if idx is not None and idx < self._length else None
+
+    def get_product(self, product_id: int):
+        """Returns the record of the product with the given id, or None if it is not in the snapshot."""
+        idx = self._position_of(product_id)
+        return self[idx] if idx is not None else None
+
+    def get_all_products(self) -> list:
+        """Returns the records of all active products."""
+        return [record for record in self if record.active]
+
+    def get_total_quantity(self) -> int:
+        """Returns the total quantity of all products, excluding AddOns, in O(1)."""
+        return self._total_quantity
+
+    def __getitem__(self, idx: int) -> ProductRecord:
+        """Returns the record at a position."""
+        if not -self._length <= idx < self._length:
+            raise IndexError("Catalog snapshot index out of range.")
+        chunk_idx, offset = divmod(idx % self._length, CHUNK_SIZE)
+        return self._chunks[chunk_idx][offset]
+
+    def __iter__(self):
+        """Iterates over the records in catalog order."""
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __len__(self):
+        """Returns the number of products in the snapshot."""
+        return self._length
+
+    def __repr__(self):
+        """Returns a debug-friendly representation of the snapshot."""
+        return f"CatalogSnapshot(version={self._version}, products={self._length})"
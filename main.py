@@ -60,8 +60,10 @@ def print_all_products_in_store(products_in_store):
 
 
 def display_all_products_in_store(store_obj, exclude_shipping=False):
-    """Lists all active products in the store and prints them out to the console."""
-    products_in_store = get_all_products_in_store(store_obj, exclude_shipping)
+    """Lists all active products in the store, as of one catalog snapshot, and prints them out to the console."""
+    products_in_store = store_obj.snapshot().get_all_products()
+    if exclude_shipping:
+        products_in_store = [record for record in products_in_store if not isinstance(record.product, products.AddOns)]
     print(f"\n-------------{txt_clr.LW} All Products in Store{txt_clr.RESET} -------------")
     print("_________________________________________________\n")
     print_all_products_in_store(products_in_store)
@@ -286,8 +288,8 @@ def check_and_offer_shipping(shopping_list, shipping_already_added):
     return shopping_list, shipping_already_added
 
 
-def main():
-    # Setup initial stock of inventory
+def setup_inventory():
+    """Returns the initial stock of inventory with the promotion catalog applied."""
     product_list = [
         products.Product("MacBook Air M2", price=1450, quantity=650),
         products.Product("Bose QuietComfort Earbuds", price=250, quantity=500),
@@ -316,7 +318,11 @@ def main():
     product_list[3].promotion = thirty_percent
     product_list[4].promotion = third_one_free
 
-    best_buy = start(product_list)
+    return product_list
+
+
+def main():
+    best_buy = start(setup_inventory())
 
     # Dispatcher mapping each menu choice to a function
     dispatcher = {
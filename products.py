@@ -1,25 +1,70 @@
+import itertools
+import weakref
+
 import store
 from promotions import Promotion
 from text_colour_helper import txt_clr
 
+DEFAULT_LOCATION = "default"
+
 
 class Product:
     """Represents a product with a name, price, quantity, and active status."""
 
-    def __init__(self, name: str, price: float, quantity: int, promotion: Promotion = None):
-        """Initializes the Product instance with name, price, quantity, and an optional promotion."""
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, price: float, quantity: int, promotion: Promotion = None, locations: dict = None):
+        """Initializes the Product instance with name, price, quantity, and an optional promotion.
+        If locations is given, it maps each location to the stock held there and must sum to quantity.
+        """
         if not name:
             raise ValueError("The name cannot be empty.")
         if price is None or price < 0:
             raise ValueError("The price must be a non-negative value.")
         if quantity is None or quantity < 0:
             raise ValueError("The quantity must be a non-negative value.")
+        if locations is not None:
+            if any(location_quantity < 0 for location_quantity in locations.values()):
+                raise ValueError("The location quantities must be non-negative.")
+            if sum(locations.values()) != quantity:
+                raise ValueError("The quantity must equal the sum of the location quantities.")
 
+        self._product_id = next(Product._ids)
         self._name = name
         self._price = price
         self._quantity = quantity
         self._active = True
         self._promotion = promotion
+        self._pricing_version = 0
+        self._locations = dict(locations) if locations is not None else None
+        self._reorder_threshold = None
+        self._stock_index = None
+        self._stock_backend = None
+        self._stock_slot = None
+        # Weak, so a store that is no longer used is not kept alive by its products.
+        self._stores = weakref.WeakSet()
+
+    def __getstate__(self):
+        """Pickles the product without the stores and low-stock index it reports to, which stay in this process."""
+        state = self.__dict__.copy()
+        del state["_stores"]
+        state["_stock_index"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled product, which is not yet held by any store in this process."""
+        self.__dict__.update(state)
+        self._stores = weakref.WeakSet()
+
+    def _notify_stores(self):
+        """Tells the stores holding the product that its catalog record is out of date."""
+        for store_obj in self._stores:
+            store_obj._product_changed(self)
+
+    @property
+    def product_id(self) -> int:
+        """Returns the unique id assigned to the product when it was created."""
+        return self._product_id
 
     @property
     def name(self):
@@ -29,6 +74,8 @@ class Product:
     @property
     def quantity(self):
         """Returns the current quantity of the product."""
+        if self._stock_backend is not None:
+            return self._stock_backend.quantity(self._stock_slot)
         return self._quantity
 
     @quantity.setter
@@ -36,8 +83,53 @@ class Product:
         """Sets the product's quantity and deactivates it if the quantity reaches 0."""
         if value < 0:
             raise ValueError("The quantity must be non-negative.")
-        self._quantity = value
-        self._active = value > 0
+        if self._locations is not None:
+            raise ValueError("The quantity is split across locations; use set_location_quantity().")
+        self._set_quantity(value)
+
+    def _set_quantity(self, value):
+        """Stores the total quantity and refreshes everything derived from it."""
+        if self._stock_backend is not None:
+            self._stock_backend.set_quantity(self._stock_slot, value)
+        else:
+            self._quantity = value
+            self._active = value > 0
+        self._notify_stores()
+        if self._stock_index is not None:
+            self._stock_index.update(self)
+
+    @property
+    def locations(self) -> dict:
+        """Returns a copy of the stock held per location, or an empty dict if the product is not stocked by location."""
+        return dict(self._locations) if self._locations else {}
+
+    def set_location_quantity(self, location: str, quantity: int):
+        """Sets the stock held at a single location and updates the total quantity.
+        Stock held before the product had any locations is kept under DEFAULT_LOCATION.
+        """
+        if quantity is None or quantity < 0:
+            raise ValueError("The quantity must be non-negative.")
+        if self._stock_backend is not None:
+            raise ValueError("Products with shared stock cannot be stocked by location.")
+        if self._locations is None:
+            self._locations = {DEFAULT_LOCATION: self._quantity} if self._quantity else {}
+        previous = self._locations.get(location, 0)
+        self._locations[location] = quantity
+        self._set_quantity(self._quantity - previous + quantity)
+
+    @property
+    def reorder_threshold(self):
+        """Returns the stock level at or below which the product should be reordered."""
+        return self._reorder_threshold
+
+    @reorder_threshold.setter
+    def reorder_threshold(self, value):
+        """Sets the reorder threshold (None disables it) and refreshes any low-stock index."""
+        if value is not None and value < 0:
+            raise ValueError("The reorder threshold must be non-negative.")
+        self._reorder_threshold = value
+        if self._stock_index is not None:
+            self._stock_index.update(self)
 
     @property
     def promotion(self):
@@ -48,6 +140,8 @@ class Product:
     def promotion(self, promotion: Promotion):
         """Sets the promotion for the product."""
         self._promotion = promotion
+        self._pricing_version += 1
+        self._notify_stores()
 
     @property
     def price(self):
@@ -60,24 +154,46 @@ class Product:
         if value < 0:
             raise ValueError("Price cannot be negative.")
         self._price = value
+        self._pricing_version += 1
+        self._notify_stores()
+
+    @property
+    def pricing_version(self) -> tuple:
+        """Returns a token that changes whenever the price or promotion of the product changes,
+        including changes made to the promotion object itself."""
+        return self._pricing_version, self._promotion.version if self._promotion else 0
 
     @property
     def active(self) -> bool:
         """Returns whether the product is active."""
+        if self._stock_backend is not None:
+            return self._stock_backend.active(self._stock_slot)
         return self._active
 
     def activate(self):
         """Activates the product."""
-        self._active = True
+        self._set_active(True)
 
     def deactivate(self):
         """Deactivates the product."""
-        self._active = False
+        self._set_active(False)
+
+    def _set_active(self, active: bool):
+        """Stores the active flag, in the shared stock backend if the product has one."""
+        if self._stock_backend is not None:
+            self._stock_backend.set_active(self._stock_slot, active)
+        else:
+            self._active = active
+        self._notify_stores()
 
     def __str__(self) -> str:
         """Returns a formatted string representation of the product."""
-        promotion_info = f" | Promotion: {txt_clr.LR}{self.promotion.name}{txt_clr.RESET}" if self.promotion else ""
-        return f"Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{self._price:.2f}{txt_clr.RESET} | Quantity: {txt_clr.LB}{self._quantity}{txt_clr.RESET} | Active: {txt_clr.LM}{self._active}{txt_clr.RESET}{promotion_info}"
+        return self._describe(self._price, self.quantity, self.active, self.promotion)
+
+    def _describe(self, price: float, quantity: int, active: bool, promotion: Promotion) -> str:
+        """Returns the formatted representation of the product for the given state, e.g. a catalog record's."""
+        promotion_info = f" | Promotion: {txt_clr.LR}{promotion.name}{txt_clr.RESET}" if promotion else ""
+        return f"Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{price:.2f}{txt_clr.RESET} | Quantity: {txt_clr.LB}{quantity}{txt_clr.RESET} | Active: {txt_clr.LM}{active}{txt_clr.RESET}{promotion_info}"
 
     def __repr__(self) -> str:
         """Returns a string representation useful for debugging."""
@@ -95,19 +211,106 @@ class Product:
             return NotImplemented
         return self._price < other._price
 
-    def buy(self, quantity: int) -> float:
+    def buy(self, quantity: int, allocation: dict = None) -> float:
         """Buys a given quantity of the product and returns the total price.
-        Ensures valid stock availability before purchase."""
-        if not self._active:
+        Ensures valid stock availability before purchase. For products stocked by location,
+        allocation maps locations to the quantity drawn from each; by default stock is
+        drawn from the locations in the order they were added."""
+        self._check_purchase(quantity)
+        total_price = self.price_for(quantity)
+        self._take_stock(quantity, allocation)
+        return total_price
+
+    def _check_purchase(self, quantity: int, reserved: int = 0):
+        """Raises the error buy() would raise for a quantity, without touching stock.
+        reserved is the stock already claimed by earlier lines of the same order."""
+        if not self.active:
             raise Exception("Cannot buy this product because it is inactive.")
         if quantity <= 0:
             raise ValueError("The quantity to buy must be greater than 0.")
-        if quantity > self._quantity:
-            raise ValueError(f"Insufficient stock to complete the purchase. Available: {self._quantity}")
+        available = self.quantity
+        if reserved + quantity > available:
+            raise ValueError(f"Insufficient stock to complete the purchase. Available: {available}")
 
-        total_price = self._promotion.apply_promotion(self, quantity) if self._promotion else self._price * quantity
-        self.quantity -= quantity
-        return total_price
+    def price_for(self, quantity: int) -> float:
+        """Returns the price of buying a quantity of the product, without touching stock."""
+        if quantity <= 0:
+            raise ValueError("The quantity to buy must be greater than 0.")
+        return self._promotion.apply_promotion(self, quantity) if self._promotion else self._price * quantity
+
+    def _take_stock(self, quantity: int, allocation: dict = None):
+        """Removes a validated quantity from stock, honouring the per-location allocation if any."""
+        if self._stock_backend is not None:
+            # Other processes may have bought in the meantime, so the checks in buy()
+            # are only advisory; the compare-and-decrement decides.
+            if not self._stock_backend.try_decrement(self._stock_slot, quantity):
+                if not self.active:
+                    raise Exception("Cannot buy this product because it is inactive.")
+                raise ValueError(f"Insufficient stock to complete the purchase. Available: {self.quantity}")
+            self._notify_stores()
+            if self._stock_index is not None:
+                self._stock_index.update(self)
+            return
+
+        if self._locations is None:
+            if allocation:
+                raise ValueError("This product is not stocked by location.")
+            self.quantity -= quantity
+            return
+
+        if allocation is None:
+            allocation = {}
+            remaining = quantity
+            for location, available in self._locations.items():
+                if remaining == 0:
+                    break
+                drawn = min(available, remaining)
+                if drawn:
+                    allocation[location] = drawn
+                    remaining -= drawn
+        if sum(allocation.values()) != quantity:
+            raise ValueError("The allocation must cover exactly the quantity to buy.")
+        for location, drawn in allocation.items():
+            if drawn <= 0 or drawn > self._locations.get(location, 0):
+                raise ValueError(f"Insufficient stock at location {location!r}.")
+
+        for location, drawn in allocation.items():
+            self._locations[location] -= drawn
+        self._set_quantity(self._quantity - quantity)
+
+    def _return_stock(self, quantity: int, allocation: dict = None):
+        """Puts back stock removed by buy(), e.g. when a later line of the same order fails."""
+        if self._stock_backend is not None:
+            self._stock_backend.try_add(self._stock_slot, quantity)
+            self._notify_stores()
+            if self._stock_index is not None:
+                self._stock_index.update(self)
+        elif self._locations is None:
+            self._set_quantity(self._quantity + quantity)
+        else:
+            for location, drawn in allocation.items():
+                self._locations[location] += drawn
+            self._set_quantity(self._quantity + quantity)
+
+    def _quantity_after(self, delta: int) -> int:
+        """Returns the quantity a bulk stock change would leave, without modifying anything."""
+        if self._locations is not None:
+            raise ValueError("The quantity is split across locations; give a location for the change.")
+        quantity = self.quantity + delta
+        if quantity < 0:
+            raise ValueError("The quantity must be non-negative.")
+        return quantity
+
+    def _locations_after(self, deltas: dict) -> dict:
+        """Returns the stock per location that bulk changes, keyed by location, would leave, without modifying anything."""
+        if self._locations is None:
+            raise ValueError("This product is not stocked by location.")
+        locations = dict(self._locations)
+        for location, delta in deltas.items():
+            locations[location] = locations.get(location, 0) + delta
+            if locations[location] < 0:
+                raise ValueError(f"Insufficient stock at location {location!r}.")
+        return locations
 
 
 class NonStockedProduct(Product):
@@ -127,36 +330,79 @@ class NonStockedProduct(Product):
         """Prevents modification of quantity for non-stocked products."""
         raise ValueError("Non-stocked products cannot have a quantity.")
 
-    def __str__(self) -> str:
+    def set_location_quantity(self, location: str, quantity: int):
+        """Prevents stocking non-stocked products by location."""
+        raise ValueError("Non-stocked products cannot have a quantity.")
+
+    def _quantity_after(self, delta: int) -> int:
+        """Prevents bulk modification of quantity for non-stocked products."""
+        raise ValueError("Non-stocked products cannot have a quantity.")
+
+    def _locations_after(self, deltas: dict) -> dict:
+        """Prevents bulk modification of quantity for non-stocked products."""
+        raise ValueError("Non-stocked products cannot have a quantity.")
+
+    def _describe(self, price: float, quantity: int, active: bool, promotion: Promotion) -> str:
         """Returns a formatted string representation of the non-stocked product."""
-        promotion_info = f" | Promotion: {txt_clr.LR}{self.promotion.name}{txt_clr.RESET}" if self.promotion else ""
-        return f"Non Stocked Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{self._price:.2f}{txt_clr.RESET} | Active: {txt_clr.LM}{self._active}{txt_clr.RESET}{promotion_info}"
+        promotion_info = f" | Promotion: {txt_clr.LR}{promotion.name}{txt_clr.RESET}" if promotion else ""
+        return f"Non Stocked Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{price:.2f}{txt_clr.RESET} | Active: {txt_clr.LM}{active}{txt_clr.RESET}{promotion_info}"
 
-    def buy(self, quantity: int) -> float:
+    def buy(self, quantity: int, allocation: dict = None) -> float:
         """Ensures that the purchasing does not reduce non-stocked quantity of zero."""
         return self.price * quantity
 
+    def _check_purchase(self, quantity: int, reserved: int = 0):
+        """Only checks the quantity, as non-stocked products are always available."""
+        if quantity <= 0:
+            raise ValueError("The quantity to buy must be greater than 0.")
+
+    def _return_stock(self, quantity: int, allocation: dict = None):
+        """Does nothing, as buying a non-stocked product takes no stock."""
+
+    def price_for(self, quantity: int) -> float:
+        """Returns the price of buying a quantity of the non-stocked product."""
+        if quantity <= 0:
+            raise ValueError("The quantity to buy must be greater than 0.")
+        return self.price * quantity
+
 
 class LimitedProduct(Product):
     """Represents a product with a purchase limit per order."""
 
-    def __init__(self, name: str, price: float, quantity: int, purchase_limit: int):
+    def __init__(self, name: str, price: float, quantity: int, purchase_limit: int, locations: dict = None):
         """Initializes a limited product with a maximum purchase limit per order."""
-        super().__init__(name, price, quantity)
-        if purchase_limit < 1:
-            raise ValueError("Purchase limit must be at least 1.")
+        super().__init__(name, price, quantity, locations=locations)
         self.purchase_limit = purchase_limit
 
-    def buy(self, quantity: int) -> float:
+    @property
+    def purchase_limit(self) -> int:
+        """Returns the maximum quantity of the product per order."""
+        return self._purchase_limit
+
+    @purchase_limit.setter
+    def purchase_limit(self, value: int):
+        """Sets the purchase limit, which must be at least 1."""
+        if value < 1:
+            raise ValueError("Purchase limit must be at least 1.")
+        self._purchase_limit = value
+        self._pricing_version += 1
+
+    def _check_purchase(self, quantity: int, reserved: int = 0):
         """Ensures that the purchase quantity does not exceed the limit."""
         if quantity > self.purchase_limit:
             raise ValueError(f"Cannot purchase more than {self.purchase_limit} of this product per order.")
-        return super().buy(quantity)
+        super()._check_purchase(quantity, reserved)
 
-    def __str__(self) -> str:
+    def price_for(self, quantity: int) -> float:
+        """Returns the price of buying a quantity of the product, enforcing the purchase limit."""
+        if quantity > self.purchase_limit:
+            raise ValueError(f"Cannot purchase more than {self.purchase_limit} of this product per order.")
+        return super().price_for(quantity)
+
+    def _describe(self, price: float, quantity: int, active: bool, promotion: Promotion) -> str:
         """Returns a formatted string representation of the limited product."""
-        promotion_info = f" | Promotion: {txt_clr.LR}{self.promotion.name}{txt_clr.RESET}" if self.promotion else ""
-        return f"Limited Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{self._price:.2f}{txt_clr.RESET} | Active: {txt_clr.LM}{self._active}{txt_clr.RESET}{promotion_info} | Purchase Limit: {txt_clr.LC}{self.purchase_limit}{txt_clr.RESET}"
+        promotion_info = f" | Promotion: {txt_clr.LR}{promotion.name}{txt_clr.RESET}" if promotion else ""
+        return f"Limited Product: {txt_clr.LY}{self._name}{txt_clr.RESET} | Price: ${txt_clr.LG}{price:.2f}{txt_clr.RESET} | Active: {txt_clr.LM}{active}{txt_clr.RESET}{promotion_info} | Purchase Limit: {txt_clr.LC}{self.purchase_limit}{txt_clr.RESET}"
 
 
 class AddOns(LimitedProduct):
@@ -176,16 +422,46 @@ class AddOns(LimitedProduct):
         """Prevents modifying the shipping quantity."""
         raise ValueError("Quantity cannot be modified.")
 
-    def __str__(self) -> str:
+    def set_location_quantity(self, location: str, quantity: int):
+        """Prevents stocking the shipping by location."""
+        raise ValueError("Quantity cannot be modified.")
+
+    def _quantity_after(self, delta: int) -> int:
+        """Prevents bulk modification of the shipping quantity."""
+        raise ValueError("Quantity cannot be modified.")
+
+    def _locations_after(self, deltas: dict) -> dict:
+        """Prevents bulk modification of the shipping quantity."""
+        raise ValueError("Quantity cannot be modified.")
+
+    def _describe(self, price: float, quantity: int, active: bool, promotion: Promotion) -> str:
         """Returns a formatted string representation of the shipping."""
-        return f"Add On: {txt_clr.LY}{self.name}{txt_clr.RESET} | Price: ${txt_clr.LB}{self.price:.2f}{txt_clr.RESET} | {txt_clr.LC}One-time purchase per order{txt_clr.RESET}"
+        return f"Add On: {txt_clr.LY}{self.name}{txt_clr.RESET} | Price: ${txt_clr.LB}{price:.2f}{txt_clr.RESET} | {txt_clr.LC}One-time purchase per order{txt_clr.RESET}"
 
-    def buy(self, quantity: int) -> float:
+    def buy(self, quantity: int, allocation: dict = None) -> float:
         """Ensures that the purchase quantity does not exceed the limit."""
         if quantity > self.purchase_limit:
             raise ValueError(f"Cannot purchase more than {self.purchase_limit} of this product per order.")
         return self._price
 
+    def _check_purchase(self, quantity: int, reserved: int = 0):
+        """Only checks the quantity, as the shipping is always available."""
+        if quantity <= 0:
+            raise ValueError("The quantity to buy must be greater than 0.")
+        if quantity > self.purchase_limit:
+            raise ValueError(f"Cannot purchase more than {self.purchase_limit} of this product per order.")
+
+    def _return_stock(self, quantity: int, allocation: dict = None):
+        """Does nothing, as buying the shipping takes no stock."""
+
+    def price_for(self, quantity: int) -> float:
+        """Returns the flat price of the add-on, enforcing the purchase limit."""
+        if quantity <= 0:
+            raise ValueError("The quantity to buy must be greater than 0.")
+        if quantity > self.purchase_limit:
+            raise ValueError(f"Cannot purchase more than {self.purchase_limit} of this product per order.")
+        return self._price
+
 
 if __name__ == "__main__":
     mac = Product("MacBook Air M2", price=1450, quantity=100)
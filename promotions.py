@@ -7,6 +7,16 @@ class Promotion(ABC):
     def __init__(self, name: str):
         self.name = name
 
+    def __setattr__(self, name, value):
+        """Sets an attribute and bumps the promotion's version, so prices computed with it are recomputed."""
+        super().__setattr__(name, value)
+        super().__setattr__("_version", self.version + 1)
+
+    @property
+    def version(self) -> int:
+        """Returns a counter that changes whenever an attribute of the promotion is set."""
+        return self.__dict__.get("_version", 0)
+
     @abstractmethod
     def apply_promotion(self, product, quantity) -> float:
         pass
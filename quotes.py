@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+QuoteLine = namedtuple("QuoteLine", ["product", "quantity", "price"])
+Quote = namedtuple("Quote", ["lines", "total_price"])
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize", "hit_rate"])
+
+
+class LRUCache:
+    """A thread-safe, bounded least-recently-used cache with hit-rate statistics."""
+
+    def __init__(self, maxsize: int = 1024):
+        """Initializes an empty cache holding at most maxsize entries."""
+        if maxsize < 1:
+            raise ValueError("The cache size must be at least 1.")
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns the cached value for a key and marks it as recently used, or default on a miss."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the hit and miss counts, size and hit rate of the cache."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            hit_rate = self._hits / lookups if lookups else 0.0
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries), hit_rate)
+
+    def __len__(self):
+        """Returns the number of cached entries."""
+        return len(self._entries)
+
+
+def quote_line(cache: LRUCache, product, quantity: int) -> QuoteLine:
+    """Prices one cart line through the cache.
+
+    Entries are keyed on the product id, its pricing version and the quantity, so a
+    change to the product's price, promotion (including the promotion's own settings)
+    or purchase limit makes its old entries unreachable and they age out of the cache. A price computed while the product was being repriced
+    is returned but not cached.
+    """
+    version = product.pricing_version
+    key = (product.product_id, version, quantity)
+    price = cache.get(key)
+    if price is None:
+        price = product.price_for(quantity)
+        if product.pricing_version == version:
+            cache.put(key, price)
+    return QuoteLine(product, quantity, price)
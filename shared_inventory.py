@@ -0,0 +1,188 @@
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+import products
+
+_CELL = struct.Struct("q")
+_SLOT_SIZE = 2 * _CELL.size  # quantity, active flag
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing block without making this process responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with the resource tracker
+        # again. Worker processes share their parent's tracker, so this is harmless.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedStockPool:
+    """Stock counts and active flags for many products in one shared memory block.
+
+    Products bound to the pool read and write their stock in the block instead of
+    in the Product object, so every process holding a copy of the product (e.g. a
+    checkout worker) draws from the same global stock. Purchases go through an
+    atomic compare-and-decrement guarded by a striped lock, so concurrent buyers in
+    different processes can never oversell.
+
+    The pool, and products bound to it, can be handed to worker processes when they
+    are started (as Process arguments or a Pool initializer); each copy attaches to
+    the same block. The creating process should call unlink() once every product
+    has been unbound or is no longer used.
+
+    Each lock stripe also keeps a change counter in the block, so a store can tell
+    cheaply whether another process sold or restocked anything since its last
+    catalog snapshot and republish the products that changed.
+    """
+
+    def __init__(self, capacity: int, lock_stripes: int = 16, ctx=None):
+        """Creates a block with room for capacity products."""
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1.")
+        if lock_stripes < 1:
+            raise ValueError("There must be at least one lock stripe.")
+        ctx = ctx or multiprocessing.get_context()
+        self._capacity = capacity
+        # The block starts with one change counter per lock stripe, followed by the slots.
+        self._header_size = lock_stripes * _CELL.size
+        self._block = shared_memory.SharedMemory(create=True, size=self._header_size + capacity * _SLOT_SIZE)
+        self._locks = [ctx.Lock() for _ in range(lock_stripes)]
+        self._next_slot = ctx.Value("i", 0)
+        self._owner = True
+
+    def __getstate__(self):
+        """Pickles the pool by the name of its block so another process can attach to it."""
+        return {
+            "capacity": self._capacity,
+            "name": self._block.name,
+            "locks": self._locks,
+            "next_slot": self._next_slot,
+        }
+
+    def __setstate__(self, state):
+        """Attaches to the block of a pool created in another process."""
+        self._capacity = state["capacity"]
+        self._block = _attach(state["name"])
+        self._locks = state["locks"]
+        self._header_size = len(self._locks) * _CELL.size
+        self._next_slot = state["next_slot"]
+        self._owner = False
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the shared memory block."""
+        return self._block.name
+
+    def bind(self, product):
+        """Moves a product's stock and active flag into the pool.
+        Only stocked products that are not split across locations can be bound."""
+        if isinstance(product, (products.NonStockedProduct, products.AddOns)):
+            raise ValueError("Only stocked products can use shared stock.")
+        if product.locations:
+            raise ValueError("Products stocked by location cannot use shared stock.")
+        if product._stock_backend is not None:
+            raise ValueError("The product already uses shared stock.")
+
+        with self._next_slot.get_lock():
+            slot = self._next_slot.value
+            if slot >= self._capacity:
+                raise ValueError("The shared stock pool is full.")
+            self._next_slot.value = slot + 1
+        with self._lock_for(slot):
+            self._write(slot, product.quantity, product.active)
+        product._stock_backend = self
+        product._stock_slot = slot
+        product._notify_stores()
+
+    def unbind(self, product):
+        """Copies the current shared stock back into the product and detaches it from the pool."""
+        if product._stock_backend is not self:
+            raise ValueError("The product does not use this shared stock pool.")
+        quantity, active = self.quantity(product._stock_slot), self.active(product._stock_slot)
+        product._stock_backend = product._stock_slot = None
+        product._quantity, product._active = quantity, active
+        product._notify_stores()
+
+    def _lock_for(self, slot: int):
+        """Returns the lock stripe guarding a slot."""
+        return self._locks[slot % len(self._locks)]
+
+    def _offset(self, slot: int) -> int:
+        """Returns the position of a slot in the block."""
+        return self._header_size + slot * _SLOT_SIZE
+
+    def _read(self, slot: int):
+        """Returns the raw quantity and active flag stored in a slot."""
+        offset = self._offset(slot)
+        buf = self._block.buf
+        return _CELL.unpack_from(buf, offset)[0], _CELL.unpack_from(buf, offset + _CELL.size)[0]
+
+    def _write(self, slot: int, quantity: int, active: bool):
+        """Stores the quantity and active flag of a slot and counts the change; callers hold the slot's lock."""
+        offset = self._offset(slot)
+        buf = self._block.buf
+        _CELL.pack_into(buf, offset, quantity)
+        _CELL.pack_into(buf, offset + _CELL.size, int(active))
+        counter = (slot % len(self._locks)) * _CELL.size
+        _CELL.pack_into(buf, counter, _CELL.unpack_from(buf, counter)[0] + 1)
+
+    def generation(self) -> tuple:
+        """Returns the change counters of the lock stripes; the value differs after any slot has been written."""
+        buf = self._block.buf
+        return tuple(_CELL.unpack_from(buf, offset)[0] for offset in range(0, self._header_size, _CELL.size))
+
+    def quantity(self, slot: int) -> int:
+        """Returns the stock held in a slot."""
+        return _CELL.unpack_from(self._block.buf, self._offset(slot))[0]
+
+    def active(self, slot: int) -> bool:
+        """Returns the active flag held in a slot."""
+        return bool(_CELL.unpack_from(self._block.buf, self._offset(slot) + _CELL.size)[0])
+
+    def set_quantity(self, slot: int, value: int):
+        """Sets the stock of a slot, deactivating it at 0 and activating it otherwise, like Product.quantity."""
+        with self._lock_for(slot):
+            self._write(slot, value, value > 0)
+
+    def set_active(self, slot: int, active: bool):
+        """Sets the active flag of a slot."""
+        with self._lock_for(slot):
+            self._write(slot, self.quantity(slot), active)
+
+    def try_decrement(self, slot: int, amount: int) -> bool:
+        """Atomically takes amount from an active slot if it holds at least that much.
+        Returns False, leaving the slot unchanged, if the slot is inactive or short of stock."""
+        with self._lock_for(slot):
+            available, active = self._read(slot)
+            if not active or available < amount:
+                return False
+            self._write(slot, available - amount, available > amount)
+            return True
+
+    def try_add(self, slot: int, delta: int) -> bool:
+        """Atomically adds delta to the stock of a slot, activating it if stock remains and deactivating it at 0.
+        Returns False, leaving the slot unchanged, if a negative delta would take the stock below 0."""
+        with self._lock_for(slot):
+            value = self.quantity(slot) + delta
+            if value < 0:
+                return False
+            self._write(slot, value, value > 0)
+            return True
+
+    def close(self):
+        """Detaches this process from the block."""
+        self._block.close()
+
+    def unlink(self):
+        """Detaches from and destroys the block; call once, from the process that created the pool."""
+        self.close()
+        if self._owner:
+            self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
@@ -0,0 +1,117 @@
+import logging
+import threading
+from collections import deque
+
+import products
+
+logger = logging.getLogger(__name__)
+
+
+class LowStockIndex:
+    """Tracks which products are at or below their reorder threshold.
+
+    Products report every stock or threshold change to the index themselves
+    (from the quantity setter, and therefore from buy()), so the index never
+    has to scan the catalog. Only the set of currently low products is kept,
+    which makes listing them O(k) in the number of low products, and each
+    callback fires exactly once when a product crosses its threshold.
+    Crossings are queued in the order they are decided and delivered one at a time,
+    so a low-stock and a restock alert for the same product never arrive swapped.
+    Callbacks run inside the stock change that caused the crossing, so an exception
+    raised by one is logged and swallowed rather than failing that change.
+    """
+
+    def __init__(self, on_low_stock=None, on_restocked=None):
+        """Initializes the index with optional callbacks taking the product as their only argument."""
+        self._low_stock_callbacks = [on_low_stock] if on_low_stock else []
+        self._restocked_callbacks = [on_restocked] if on_restocked else []
+        self._tracked = set()
+        self._below = {}
+        self._pending = deque()
+        self._lock = threading.Lock()
+        # Reentrant so a callback that changes stock delivers its own crossings in turn.
+        self._delivery_lock = threading.RLock()
+
+    def subscribe(self, on_low_stock=None, on_restocked=None):
+        """Registers additional callbacks for threshold crossings."""
+        if on_low_stock:
+            self._low_stock_callbacks.append(on_low_stock)
+        if on_restocked:
+            self._restocked_callbacks.append(on_restocked)
+
+    def track(self, product, threshold: int = None):
+        """Starts tracking a product, optionally setting its reorder threshold.
+        A product that is already low when tracked fires the low-stock callbacks once.
+        """
+        if isinstance(product, (products.NonStockedProduct, products.AddOns)):
+            raise ValueError("Only stocked products can have a reorder threshold.")
+        if product._stock_index is not None and product._stock_index is not self:
+            raise ValueError("The product is already tracked by another low-stock index.")
+        with self._lock:
+            self._tracked.add(product)
+        product._stock_index = self
+        if threshold is not None:
+            product.reorder_threshold = threshold
+        else:
+            self.update(product)
+
+    def untrack(self, product):
+        """Stops tracking a product without firing any callbacks."""
+        with self._lock:
+            self._tracked.discard(product)
+            self._below.pop(product, None)
+        if product._stock_index is self:
+            product._stock_index = None
+
+    def update(self, product):
+        """Re-evaluates a product after its quantity or threshold changed.
+        The crossing is decided and queued under the lock; the callbacks run after it is
+        released, in the order the crossings were decided.
+        """
+        with self._lock:
+            if product not in self._tracked:
+                return
+            threshold = product.reorder_threshold
+            if threshold is None:
+                # Disabling the threshold is not a crossing, so like untrack() it fires nothing.
+                self._below.pop(product, None)
+                return
+            is_low = product.quantity <= threshold
+            was_low = product in self._below
+            if is_low == was_low:
+                return
+            if is_low:
+                self._below[product] = None
+                callbacks = list(self._low_stock_callbacks)
+            else:
+                del self._below[product]
+                callbacks = list(self._restocked_callbacks)
+            self._pending.append((callbacks, product))
+        self._deliver()
+
+    def _deliver(self):
+        """Runs the callbacks of queued crossings in order until the queue is empty."""
+        with self._delivery_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        return
+                    callbacks, product = self._pending.popleft()
+                for callback in callbacks:
+                    try:
+                        callback(product)
+                    except Exception:
+                        logger.exception("Stock alert callback %r failed for %s.", callback, product.name)
+
+    def below_threshold(self) -> list:
+        """Returns the tracked products at or below their reorder threshold, in the order they crossed it."""
+        with self._lock:
+            return list(self._below)
+
+    def __contains__(self, product):
+        """Allows checking if a product is currently low on stock using the 'in' operator."""
+        return product in self._below
+
+    def __len__(self):
+        """Returns the number of products currently low on stock."""
+        return len(self._below)
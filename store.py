@@ -1,43 +1,341 @@
-import products
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from operator import itemgetter
+
+from allocation import AllocationPolicy, PriorityOrder
+from catalog import CatalogSnapshot
+from promotions import Promotion
+from quotes import LRUCache, Quote, quote_line
+
+
+def _summed_deltas(changes) -> dict:
+    """Returns stock changes given as a mapping or as (key, delta) pairs as a mapping, adding up the deltas of repeated keys."""
+    pairs = list(changes.items() if isinstance(changes, Mapping) else changes or ())
+    if not set(map(type, map(itemgetter(1), pairs))) <= {int}:
+        raise ValueError("The quantity delta must be an integer.")
+    if isinstance(changes, Mapping):
+        return dict(pairs)
+    totals = {}
+    for key, delta in pairs:
+        totals[key] = totals.get(key, 0) + delta
+    return totals
 
 
 class Store:
-    """This Store class manages all product instances and provides functionality for inventory management."""
+    """This Store class manages all product instances and provides functionality for inventory management.
+
+    Listing and totals read an immutable catalog snapshot without locking. Writers
+    publish: products tell the stores holding them when they change and the change
+    is published straight away, while orders and bulk updates publish everything
+    they changed as one version when they commit, so readers never see a half-applied
+    order and never wait on one.
+    """
 
-    def __init__(self, products_list: list):
-        """Initializes the store with a list of products."""
+    def __init__(self, products_list: list, allocation_policy: AllocationPolicy = None, quote_cache_size: int = 1024):
+        """Initializes the store with a list of products, the policy used to pick which
+        locations fulfil an order (priority order of the products' locations by default)
+        and the number of line prices kept by the quote cache."""
         self._products_list = products_list
+        self._products_by_id = {product.product_id: product for product in products_list}
+        self._members = set(products_list)
+        self._allocation_policy = allocation_policy or PriorityOrder()
+        self._write_lock = threading.RLock()
+        self._in_transaction = False
+        self._stale = set()
+        self._shared = set()
+        self._pool_generations = {}
+        self._pooled = {}
+        self._snapshot = CatalogSnapshot.build(products_list)
+        for product in products_list:
+            self._register(product)
+        self._quote_cache = LRUCache(quote_cache_size)
 
     @property
     def products_list(self):
         """Returns the list of products in the store."""
         return self._products_list
 
+    @property
+    def allocation_policy(self):
+        """Returns the policy used to allocate orders across locations."""
+        return self._allocation_policy
+
+    @allocation_policy.setter
+    def allocation_policy(self, policy: AllocationPolicy):
+        """Sets the policy used to allocate orders across locations."""
+        self._allocation_policy = policy
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Returns the latest published catalog snapshot in O(1), without locking."""
+        return self._snapshot
+
+    def publish(self, changed_products=None) -> CatalogSnapshot:
+        """Publishes a new catalog version reflecting the given products, or every product if None."""
+        with self._write_lock:
+            if changed_products is None:
+                self._stale.clear()
+                self._snapshot = CatalogSnapshot.build(self._products_list, self._snapshot.version + 1)
+            else:
+                changed_products = list(changed_products)
+                self._stale.difference_update(changed_products)
+                self._snapshot = self._snapshot.updated(changed_products)
+            return self._snapshot
+
+    def _product_changed(self, product):
+        """Records a change reported by a product and publishes it without waiting for the write lock."""
+        self._stale.add(product)
+        self._publish_pending()
+
+    def _publish_pending(self):
+        """Publishes the stale products if the write lock is free.
+        Otherwise the thread holding it publishes them: a transaction does so when it
+        commits, and every holder checks again after releasing the lock."""
+        while self._stale and self._write_lock.acquire(blocking=False):
+            try:
+                if self._in_transaction:
+                    return
+                self._publish_stale()
+            finally:
+                self._write_lock.release()
+
+    def _publish_stale(self):
+        """Publishes the products that reported a change since the last publish; the caller holds the write lock."""
+        # Products are unmarked before their records are read, so a change reported meanwhile marks them again.
+        stale = list(self._stale)
+        if stale:
+            self._stale.difference_update(stale)
+            for product in stale:
+                if product._stock_backend is not None:
+                    self._watch_pool(product)
+            self._snapshot = self._snapshot.updated(stale)
+
+    def refresh_shared_stock(self) -> int:
+        """Publishes the products whose shared stock was changed by another process and returns how many changed.
+        Sales made by checkout workers only reach this store's snapshot and low-stock alerts through this call, so a store serving reads should call it
+        periodically. It is cheap when no pool has been written since the last call."""
+        with self._write_lock:
+            changed = self._collect_pooled_changes()
+            self._stale.update(changed)
+            if not self._in_transaction:
+                self._publish_stale()
+        self._publish_pending()
+        for product in changed:
+            if product._stock_index is not None:
+                product._stock_index.update(product)
+        return len(changed)
+
+    def _watch_pool(self, product):
+        """Starts watching the shared stock pool of a product for changes made by other processes."""
+        pool = product._stock_backend
+        if pool not in self._pooled:
+            self._pooled[pool] = set()
+            self._pool_generations[pool] = None
+        self._pooled[pool].add(product)
+
+    def _collect_pooled_changes(self) -> list:
+        """Returns the pooled products whose shared stock no longer matches their published record."""
+        changed = []
+        for pool, seen in list(self._pool_generations.items()):
+            pooled = self._pooled[pool] = {product for product in self._pooled[pool] if product._stock_backend is pool}
+            if not pooled:
+                del self._pooled[pool], self._pool_generations[pool]
+                continue
+            generation = pool.generation()
+            if generation == seen:
+                continue
+            # Read the counters before the slots, so a write made meanwhile is seen by the next check.
+            self._pool_generations[pool] = generation
+            for product in pooled:
+                record = self._snapshot.get_product(product.product_id)
+                if record is not None and (record.quantity, record.active) != (product.quantity, product.active):
+                    changed.append(product)
+        return changed
+
+    @contextmanager
+    def _transaction(self):
+        """Holds the write lock for a change to several products and publishes them as one
+        catalog version when it is done. Readers keep the last published snapshot meanwhile,
+        so they never see a half-applied change and never wait for one."""
+        try:
+            with self._write_lock:
+                outermost = not self._in_transaction
+                self._in_transaction = True
+                try:
+                    yield
+                finally:
+                    if outermost:
+                        self._in_transaction = False
+                        # A change that failed has been undone, so this republishes the products as they were.
+                        self._publish_stale()
+        finally:
+            self._publish_pending()
+
+    def _register(self, product):
+        """Makes the product report its changes to this store, noting products held by several stores."""
+        product._stores.add(self)
+        if product._stock_backend is not None:
+            self._watch_pool(product)
+        if len(product._stores) > 1:
+            for store_obj in product._stores:
+                store_obj._shared.add(product)
+
+    def _unregister(self, product):
+        """Stops the product reporting its changes to this store."""
+        product._stores.discard(self)
+        self._shared.discard(product)
+        for pooled in self._pooled.values():
+            pooled.discard(product)
+        if len(product._stores) == 1:
+            for store_obj in product._stores:
+                store_obj._shared.discard(product)
+
     def add_product(self, product):
         """Adds a new product to the store."""
-        if product not in self._products_list:
-            self._products_list.append(product)
+        with self._write_lock:
+            if product not in self._products_list:
+                self._products_list.append(product)
+                self._products_by_id[product.product_id] = product
+                self._members.add(product)
+                self._register(product)
+                self._snapshot = self._snapshot.appended(product)
 
     def remove_product(self, product):
         """Removes a product from the store if it exists."""
-        if product in self._products_list:
-            self._products_list.remove(product)
+        with self._write_lock:
+            if product in self._products_list:
+                self._products_list.remove(product)
+                self._products_by_id.pop(product.product_id, None)
+                self._members.discard(product)
+                self._unregister(product)
+                self.publish()
+
+    def bulk_update(self, prices=None, quantity_deltas=None, location_deltas=None, promotions=None, active=None) -> int:
+        """Applies many changes atomically and returns the number of products changed.
+
+        Changes are grouped by field, each mapping a product to its change: prices and
+        promotions to the new value, active to True or False, quantity_deltas to the
+        change in stock, and location_deltas maps (product, location) pairs to the change
+        in stock there for products stocked by location. Each field also accepts an
+        iterable of (key, change) pairs in the order the changes were made: the last
+        value given for a product wins and its stock changes add up. Every change is
+        validated before any is applied, so an invalid one leaves the store untouched,
+        and the changed products are published as one catalog version when the update commits.
+        """
+        prices = dict(prices or ())
+        quantity_deltas = _summed_deltas(quantity_deltas)
+        location_deltas = _summed_deltas(location_deltas)
+        promotions = dict(promotions or ())
+        active = dict(active or ())
+
+        with self._transaction():
+            products_by_location = {}
+            for product, location in location_deltas:
+                products_by_location.setdefault(product, {})[location] = location_deltas[product, location]
+            for changes in (prices, quantity_deltas, products_by_location, promotions, active):
+                if not changes.keys() <= self._members:
+                    product = next(product for product in changes if product not in self._members)
+                    raise ValueError(f"{product.name} is not in the store.")
+
+            if None in prices.values() or min(prices.values(), default=0) < 0:
+                raise ValueError("Price cannot be negative.")
+            if not all(issubclass(kind, Promotion) for kind in set(map(type, promotions.values())) - {type(None)}):
+                raise ValueError("The promotion must be a Promotion or None.")
+            if not set(map(type, active.values())) <= {bool}:
+                raise ValueError("The active flag must be True or False.")
+            quantities = {product: product._quantity_after(delta) for product, delta in quantity_deltas.items()}
+            locations = {product: product._locations_after(deltas) for product, deltas in products_by_location.items()}
+
+            # Other processes may sell shared stock after the checks above, so shared stock is
+            # changed first, with reductions before additions: only a reduction can fail, and
+            # one that does is undone together with the reductions before it.
+            pooled = sorted((product for product in quantities if product._stock_backend is not None),
+                            key=quantity_deltas.__getitem__)
+            for idx, product in enumerate(pooled):
+                if not product._stock_backend.try_add(product._stock_slot, quantity_deltas[product]):
+                    for taken in pooled[:idx]:
+                        taken._stock_backend.try_add(taken._stock_slot, -quantity_deltas[taken])
+                    raise ValueError("The quantity must be non-negative.")
+
+            # Everything is valid, so the loops below bypass the per-call checks of the setters.
+            for product, price in prices.items():
+                product._price = price
+                product._pricing_version += 1
+            for product, promotion in promotions.items():
+                product._promotion = promotion
+                product._pricing_version += 1
+            for product, quantity in quantities.items():
+                if product._stock_backend is None:
+                    product._quantity = quantity
+                    product._active = quantity > 0
+            for product, product_locations in locations.items():
+                product._locations = product_locations
+                product._quantity = quantity = sum(product_locations.values())
+                product._active = quantity > 0
+            for product, flag in active.items():
+                if product._stock_backend is not None:
+                    product._stock_backend.set_active(product._stock_slot, flag)
+                else:
+                    product._active = flag
+            for product in quantities.keys() | locations.keys():
+                if product._stock_index is not None:
+                    product._stock_index.update(product)
+
+            changed = prices.keys() | promotions.keys() | quantities.keys() | locations.keys() | active.keys()
+            self._stale |= changed
+            for product in changed & self._shared:
+                product._notify_stores()
+            return len(changed)
 
     def get_total_quantity(self) -> int:
         """Gets the total quantity of all products in the store, excluding AddOns."""
-        return sum(product.quantity for product in self._products_list if not isinstance(product, products.AddOns))
+        return self._snapshot.get_total_quantity()
+
+    def get_product(self, product_id: int):
+        """Returns the product with the given id, or None if it is not in the store."""
+        return self._products_by_id.get(product_id)
 
     def get_all_products(self) -> list:
         """Returns a list of all active products in the store.
         A product is considered active if product.active == True.
+        The Product objects are live; read snapshot() for their state as of one catalog version.
         """
-        return [product for product in self._products_list if product.active]
+        return [record.product for record in self._snapshot if record.active]
 
     def order(self, shopping_list: list) -> float:
-        total_price = 0
-        for product, quantity in shopping_list:
-            total_price += product.buy(quantity)
-        return total_price
+        """Buys every (product, quantity) line of the shopping list and returns the total price.
+        The order is all or nothing: every line is checked and stock for products held in
+        several locations is allocated for the whole cart before anything is bought, and
+        lines already bought are returned to stock if a later one still fails.
+        The order is published as one catalog version once it has been fully applied."""
+        with self._transaction():
+            reserved = {}
+            for product, quantity in shopping_list:
+                product._check_purchase(quantity, reserved.get(product, 0))
+                reserved[product] = reserved.get(product, 0) + quantity
+            allocations = self._allocation_policy.allocate(shopping_list)
+            total_price = 0
+            bought = []
+            try:
+                for (product, quantity), allocation in zip(shopping_list, allocations):
+                    total_price += product.buy(quantity, allocation)
+                    bought.append((product, quantity, allocation))
+            except Exception:
+                # Shared stock can still be sold by another process between the checks and the purchase.
+                for product, quantity, allocation in reversed(bought):
+                    product._return_stock(quantity, allocation)
+                raise
+            return total_price
+
+    def quote(self, shopping_list: list) -> Quote:
+        """Prices every (product, quantity) line of the shopping list without touching stock.
+        Line prices are memoized in an LRU cache, see quote_cache_info()."""
+        lines = [quote_line(self._quote_cache, product, quantity) for product, quantity in shopping_list]
+        return Quote(lines, sum(line.price for line in lines))
+
+    def quote_cache_info(self):
+        """Returns the hit and miss counts, size and hit rate of the quote cache."""
+        return self._quote_cache.cache_info()
 
     def __contains__(self, product):
         """Allows checking if a product exists in the store using the 'in' operator."""
@@ -55,4 +353,4 @@ class Store:
         """Combines two stores into a new store containing all products from both."""
         if not isinstance(other, Store):
             return NotImplemented
-        return Store(self._products_list + other._products_list)
+        return Store(self._products_list + other._products_list, self._allocation_policy)
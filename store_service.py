@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+import main as store_app
+import store
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class HttpError(Exception):
+    """An error that is reported to the client with the given HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def product_to_dict(record) -> dict:
+    """Returns a JSON-serializable representation of a product's catalog record."""
+    return {
+        "id": record.product_id,
+        "name": record.name,
+        "type": type(record.product).__name__,
+        "price": record.price,
+        "quantity": record.quantity,
+        "active": record.active,
+        "promotion": record.promotion.name if record.promotion else None,
+        "locations": dict(record.locations),
+    }
+
+
+class StoreService:
+    """Serves a Store over HTTP/1.1 with JSON bodies, using only asyncio.
+
+    Connections are kept alive between requests. Quotes and orders run on a
+    bounded pool of worker threads so the event loop keeps accepting requests
+    while one is being processed. Pricing is pure Python, so the threads do not
+    price carts in parallel; they only keep slow requests off the event loop.
+    Each order is settled all or nothing under the store's write lock, and reads
+    are served from the store's latest catalog snapshot and never wait for orders.
+
+    Endpoints:
+        GET  /products?offset=0&limit=20   Paginated list of active products.
+        GET  /products/<id>                A single product.
+        GET  /total                        Total quantity in the store.
+        POST /quotes                       {"items": [{"product_id": 1, "quantity": 2}]}
+        POST /orders                       {"items": [{"product_id": 1, "quantity": 2}]}
+        POST /orders/batch                 {"carts": [{"items": [...]}, ...]}
+    """
+
+    def __init__(self, store_obj: store.Store, host: str = "127.0.0.1", port: int = 8080,
+                 max_workers: int = 4, keep_alive_timeout: float = 15.0):
+        """Initializes the service for a store; call start() to begin listening."""
+        self._store = store_obj
+        self._host = host
+        self._port = port
+        self._keep_alive_timeout = keep_alive_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="store-worker")
+        self._server = None
+        self._connections = set()
+        self._idle_connections = set()
+        self._closing = False
+
+    @property
+    def port(self) -> int:
+        """Returns the port the service listens on, which is assigned by the OS when started with port 0."""
+        if self._server is not None:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    async def start(self):
+        """Starts listening for connections."""
+        self._server = await asyncio.start_server(self._handle_connection, self._host, self._port)
+        return self
+
+    async def serve_forever(self):
+        """Starts the service if needed and serves until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stops listening, lets requests in progress finish, closes idle connections and shuts down the worker pool."""
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+            for task in self._idle_connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves requests on one connection until the client closes it, it goes idle or the service closes."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive and not self._closing:
+                self._idle_connections.add(task)
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self._keep_alive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                finally:
+                    self._idle_connections.discard(task)
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version, headers, body = await self._read_request(request_line, reader)
+                except HttpError as e:
+                    self._write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = connection == "keep-alive"
+                else:
+                    keep_alive = connection != "close"
+                keep_alive = keep_alive and not self._closing
+
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Only idle connections are cancelled, by close(); there is nothing left to clean up.
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(request_line: bytes, reader: asyncio.StreamReader):
+        """Parses the request line, headers and body of a single request."""
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length header.")
+        if length > MAX_BODY_SIZE:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large.")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool):
+        """Writes a JSON response to the connection."""
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        """Routes a request to its handler and returns the status and JSON payload."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+
+        if method == "GET" and parts == ["products"]:
+            return HTTPStatus.OK, self._list_products(parse_qs(url.query))
+        if method == "GET" and len(parts) == 2 and parts[0] == "products":
+            return HTTPStatus.OK, self._get_product(parts[1])
+        if method == "GET" and parts == ["total"]:
+            return HTTPStatus.OK, {"total_quantity": self._store.get_total_quantity()}
+        if method == "POST" and parts == ["quotes"]:
+            shopping_list = self._parse_cart(self._parse_json(body))
+            loop = asyncio.get_running_loop()
+            return HTTPStatus.OK, await loop.run_in_executor(self._executor, self._quote, shopping_list)
+        if method == "POST" and parts == ["orders"]:
+            shopping_list = self._parse_cart(self._parse_json(body))
+            loop = asyncio.get_running_loop()
+            total_price = await loop.run_in_executor(self._executor, self._settle_order, shopping_list)
+            return HTTPStatus.OK, {"total_price": total_price}
+        if method == "POST" and parts == ["orders", "batch"]:
+            carts = self._parse_json(body).get("carts")
+            if not isinstance(carts, list):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "The request must contain a list of carts.")
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._executor, self._settle_batch, carts)
+            return HTTPStatus.OK, {"results": results}
+        if parts and parts[0] in ("products", "total", "quotes", "orders"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method {method} is not allowed here.")
+        raise HttpError(HTTPStatus.NOT_FOUND, "Not found.")
+
+    def _list_products(self, query: dict) -> dict:
+        """Returns one page of active products."""
+        try:
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", [str(DEFAULT_PAGE_SIZE)])[0])
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Offset and limit must be integers.")
+        if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Offset must be non-negative and limit between 1 and {MAX_PAGE_SIZE}.")
+
+        snapshot = self._store.snapshot()
+        products_in_store = snapshot.get_all_products()
+        page = products_in_store[offset:offset + limit]
+        return {
+            "products": [product_to_dict(record) for record in page],
+            "version": snapshot.version,
+            "offset": offset,
+            "limit": limit,
+            "total": len(products_in_store),
+        }
+
+    def _get_product(self, raw_id: str) -> dict:
+        """Returns a single product by id."""
+        try:
+            product_id = int(raw_id)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The product id must be an integer.")
+        record = self._store.snapshot().get_product(product_id)
+        if record is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Product {product_id} not found.")
+        return product_to_dict(record)
+
+    @staticmethod
+    def _parse_json(body: bytes) -> dict:
+        """Decodes a JSON object from the request body."""
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The request body must be valid JSON.")
+        if not isinstance(payload, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The request body must be a JSON object.")
+        return payload
+
+    def _parse_cart(self, cart) -> list:
+        """Turns a cart of {"product_id", "quantity"} items into a shopping list."""
+        items = cart.get("items") if isinstance(cart, dict) else None
+        if not isinstance(items, list) or not items:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "A cart must contain a non-empty list of items.")
+
+        shopping_list = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Each item must be a JSON object.")
+            product_id, quantity = item.get("product_id"), item.get("quantity")
+            # bool is a subclass of int, so JSON true/false would otherwise pass as 1/0.
+            if type(product_id) is not int or type(quantity) is not int:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Each item needs an integer product_id and quantity.")
+            if quantity <= 0:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "The quantity to buy must be greater than 0.")
+            product = self._store.get_product(product_id)
+            if product is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, f"Product {product_id} not found.")
+            shopping_list.append((product, quantity))
+        return shopping_list
+
+    def _quote(self, shopping_list: list) -> dict:
+        """Prices a cart without placing an order; runs on a worker thread."""
+        try:
+            quote = self._store.quote(shopping_list)
+        except Exception as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        return {
+            "lines": [{"product_id": line.product.product_id, "quantity": line.quantity, "price": line.price}
+                      for line in quote.lines],
+            "total_price": quote.total_price,
+        }
+
+    def _settle_order(self, shopping_list: list) -> float:
+        """Places a single order, which either succeeds as a whole or changes nothing; runs on a worker thread."""
+        try:
+            return self._store.order(shopping_list)
+        except Exception as e:
+            raise HttpError(HTTPStatus.CONFLICT, str(e))
+
+    def _settle_batch(self, carts: list) -> list:
+        """Places every cart of a batch in turn, reporting success or failure per cart; runs on a worker thread.
+        Each cart is all or nothing, so a failed cart leaves the stock as it was."""
+        results = []
+        for cart in carts:
+            try:
+                total_price = self._store.order(self._parse_cart(cart))
+                results.append({"ok": True, "total_price": total_price})
+            except HttpError as e:
+                results.append({"ok": False, "status": e.status.value, "error": str(e)})
+            except Exception as e:
+                results.append({"ok": False, "status": HTTPStatus.CONFLICT.value, "error": str(e)})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Best Buy store over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    service = StoreService(store_app.start(store_app.setup_inventory()), args.host, args.port, args.workers)
+    print(f"Serving the store on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
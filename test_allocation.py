@@ -0,0 +1,91 @@
+import pytest
+from products import Product, NonStockedProduct, AddOns, DEFAULT_LOCATION
+from allocation import PriorityOrder, LargestStockFirst, FewestSplits
+from store import Store
+
+
+def make_laptop():
+    return Product("MacBook Air M2", price=1000, quantity=15, locations={"Berlin": 5, "Paris": 10})
+
+
+def test_product_with_locations_tracks_total_quantity():
+    """Test that the quantity of a product stocked by location is the sum over its locations."""
+    product = make_laptop()
+    assert product.quantity == 15
+    product.set_location_quantity("Madrid", 5)
+    assert product.quantity == 20
+    assert product.locations == {"Berlin": 5, "Paris": 10, "Madrid": 5}
+
+
+def test_invalid_locations_raise_exception():
+    """Test that location quantities must add up to the product quantity."""
+    with pytest.raises(ValueError, match="The quantity must equal the sum of the location quantities."):
+        Product("MacBook Air M2", price=1000, quantity=10, locations={"Berlin": 5})
+
+
+def test_setting_location_keeps_existing_stock_in_default_location():
+    """Test that assigning a location to a single-pool product keeps its earlier stock."""
+    product = Product("iPad Pro", price=1200, quantity=10)
+    product.set_location_quantity("Berlin", 3)
+    assert product.locations == {DEFAULT_LOCATION: 10, "Berlin": 3}
+    assert product.quantity == 13
+
+
+@pytest.mark.parametrize("product, message", [
+    (NonStockedProduct("Windows License", price=125), "Non-stocked products cannot have a quantity."),
+    (AddOns("Shipping", price=10), "Quantity cannot be modified."),
+])
+def test_unstocked_products_cannot_be_stocked_by_location(product, message):
+    """Test that non-stocked products and add-ons reject per-location stock and stay orderable."""
+    with pytest.raises(ValueError, match=message):
+        product.set_location_quantity("Berlin", 5)
+    assert product.locations == {}
+    assert Store([product]).order([(product, 1)]) == product.price
+
+
+def test_buying_draws_from_locations_and_deactivates_when_empty():
+    """Test that buying across locations drains them and deactivates the product at zero."""
+    product = make_laptop()
+    product.buy(7)
+    assert product.locations == {"Berlin": 0, "Paris": 8}
+    product.buy(8)
+    assert product.quantity == 0
+    assert product.active is False
+
+
+def test_priority_order_policy():
+    """Test that the priority order policy prefers the listed locations first."""
+    product = make_laptop()
+    store = Store([product], PriorityOrder(["Paris"]))
+    store.order([(product, 12)])
+    assert product.locations == {"Berlin": 3, "Paris": 0}
+
+
+def test_largest_stock_first_policy():
+    """Test that the largest stock first policy draws from the fullest location."""
+    product = make_laptop()
+    store = Store([product], LargestStockFirst())
+    store.order([(product, 4)])
+    assert product.locations == {"Berlin": 5, "Paris": 6}
+
+
+def test_fewest_splits_policy_ships_cart_from_one_location():
+    """Test that the fewest splits policy uses a single location when one can fill the cart."""
+    laptop = Product("MacBook Air M2", price=1000, quantity=20, locations={"Berlin": 10, "Paris": 10})
+    phone = Product("Google Pixel 7", price=500, quantity=12, locations={"Berlin": 2, "Paris": 10})
+    store = Store([laptop, phone], FewestSplits())
+    assert store.order([(laptop, 5), (phone, 4)]) == 7000
+    assert laptop.locations == {"Berlin": 10, "Paris": 5}
+    assert phone.locations == {"Berlin": 2, "Paris": 6}
+    assert store.get_total_quantity() == 23
+
+
+def test_order_exceeding_total_stock_changes_nothing():
+    """Test that an order exceeding stock across all locations fails before anything is bought."""
+    laptop = make_laptop()
+    phone = Product("Google Pixel 7", price=500, quantity=5)
+    store = Store([laptop, phone])
+    with pytest.raises(ValueError, match="Insufficient stock to complete the purchase. Available: 15"):
+        store.order([(phone, 1), (laptop, 10), (laptop, 6)])
+    assert phone.quantity == 5
+    assert laptop.quantity == 15
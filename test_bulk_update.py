@@ -0,0 +1,115 @@
+import pytest
+from products import Product, NonStockedProduct
+from promotions import PercentageDiscount
+from stock_alerts import LowStockIndex
+from store import Store
+
+
+def make_store():
+    laptop = Product("MacBook Air M2", price=1450, quantity=10)
+    phone = Product("Google Pixel 7", price=500, quantity=5, locations={"Berlin": 2, "Paris": 3})
+    license_key = NonStockedProduct("Windows License", price=125)
+    return Store([laptop, phone, license_key]), laptop, phone, license_key
+
+
+def test_bulk_update_applies_all_changes_and_publishes_once():
+    """Test that a bulk update restocks, reprices and republishes the catalog a single time."""
+    store, laptop, phone, license_key = make_store()
+    discount = PercentageDiscount("30% off!", discount_percentage=30)
+    version = store.snapshot().version
+
+    changed = store.bulk_update(
+        prices={laptop: 1300},
+        quantity_deltas={laptop: 2},
+        location_deltas={(phone, "Madrid"): 4},
+        promotions={license_key: discount},
+        active={license_key: False},
+    )
+
+    assert changed == 3
+    assert laptop.price == 1300
+    assert laptop.quantity == 12
+    assert phone.locations == {"Berlin": 2, "Paris": 3, "Madrid": 4}
+    assert license_key.promotion is discount
+    assert license_key.active is False
+    assert store.snapshot().version == version + 1
+    assert store.get_total_quantity() == 21
+
+
+def test_bulk_update_takes_changes_as_pairs_in_order():
+    """Test that changes given as (key, change) pairs keep the last value and add up stock changes."""
+    store, laptop, phone, _ = make_store()
+
+    changed = store.bulk_update(
+        prices=[(laptop, 1300), (phone, 450), (laptop, 1200)],
+        quantity_deltas=[(laptop, 2), (laptop, -5), (laptop, 1)],
+        location_deltas=[((phone, "Berlin"), -2), ((phone, "Berlin"), 1)],
+        active=[(phone, False), (phone, True)],
+    )
+
+    assert changed == 2
+    assert (laptop.price, laptop.quantity) == (1200, 8)
+    assert (phone.price, phone.locations, phone.active) == (450, {"Berlin": 1, "Paris": 3}, True)
+    with pytest.raises(ValueError, match="The quantity delta must be an integer."):
+        store.bulk_update(prices=[(laptop, 1000)], quantity_deltas=[(laptop, 1), (laptop, True)])
+    assert (laptop.price, laptop.quantity) == (1200, 8)
+
+
+def test_invalid_update_leaves_store_untouched():
+    """Test that one invalid change prevents every change in the batch from being applied."""
+    store, laptop, phone, _ = make_store()
+    with pytest.raises(ValueError, match="The quantity must be non-negative."):
+        store.bulk_update(prices={laptop: 1000}, location_deltas={(phone, "Berlin"): 1},
+                          quantity_deltas={laptop: -11})
+    assert laptop.price == 1450
+    assert phone.quantity == 5
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("prices", -1, "Price cannot be negative."),
+    ("quantity_deltas", 1.5, "The quantity delta must be an integer."),
+    ("quantity_deltas", True, "The quantity delta must be an integer."),
+    ("promotions", "30% off!", "The promotion must be a Promotion or None."),
+    ("active", 1, "The active flag must be True or False."),
+    ("location_deltas", 1, "This product is not stocked by location."),
+])
+def test_invalid_updates_raise_exception(field, value, message):
+    """Test that malformed changes are rejected."""
+    store, laptop, _, _ = make_store()
+    key = (laptop, "Berlin") if field == "location_deltas" else laptop
+    with pytest.raises(ValueError, match=message):
+        store.bulk_update(**{field: {key: value}})
+
+
+def test_bulk_update_rejects_products_outside_the_store_and_non_stocked_quantities():
+    """Test that only stocked products in the store can be restocked."""
+    store, _, phone, license_key = make_store()
+    with pytest.raises(ValueError, match="is not in the store."):
+        store.bulk_update(prices={Product("iPad Pro", price=1200, quantity=1): 1})
+    with pytest.raises(ValueError, match="Non-stocked products cannot have a quantity."):
+        store.bulk_update(quantity_deltas={license_key: 1})
+    with pytest.raises(ValueError, match="give a location"):
+        store.bulk_update(quantity_deltas={phone: 1})
+
+
+def test_bulk_update_refreshes_prices_and_low_stock_index():
+    """Test that derived state such as quotes and low-stock alerts follows a bulk update."""
+    store, laptop, _, _ = make_store()
+    alerts = []
+    LowStockIndex(on_low_stock=alerts.append).track(laptop, threshold=3)
+    assert store.quote([(laptop, 1)]).total_price == 1450
+
+    store.bulk_update(prices={laptop: 1000}, quantity_deltas={laptop: -8})
+    assert store.quote([(laptop, 1)]).total_price == 1000
+    assert alerts == [laptop]
+
+
+def test_bulk_update_reaches_every_store_holding_a_product():
+    """Test that a product held by two stores is republished by both after a bulk update."""
+    store, laptop, _, _ = make_store()
+    outlet = Store([laptop])
+
+    store.bulk_update(quantity_deltas={laptop: 5})
+
+    assert store.get_total_quantity() == 20
+    assert outlet.get_total_quantity() == 15
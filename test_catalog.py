@@ -0,0 +1,176 @@
+import gc
+import threading
+import weakref
+
+import pytest
+
+from catalog import CHUNK_SIZE
+from products import Product, AddOns
+from stock_alerts import LowStockIndex
+from store import Store
+
+
+def make_store(count=100):
+    return Store([Product(f"Product {idx}", price=10, quantity=50) for idx in range(count)])
+
+
+def test_snapshot_held_by_reader_is_unchanged_by_orders():
+    """Test that a snapshot keeps showing the state it was taken at."""
+    store = make_store()
+    product = store.products_list[0]
+    before = store.snapshot()
+
+    store.order([(product, 50)])
+
+    assert before[0].quantity == 50
+    assert before[0].active is True
+    assert store.snapshot()[0].quantity == 0
+    assert store.snapshot().version == before.version + 1
+    assert product not in store.get_all_products()
+
+
+def test_new_version_shares_untouched_chunks():
+    """Test that publishing copies only the chunks holding changed products."""
+    store = make_store(3 * CHUNK_SIZE)
+    before = store.snapshot()
+    store.order([(store.products_list[CHUNK_SIZE], 1)])
+    after = store.snapshot()
+
+    assert after._chunks[0] is before._chunks[0]
+    assert after._chunks[1] is not before._chunks[1]
+    assert after._chunks[2] is before._chunks[2]
+
+
+def test_total_quantity_tracks_orders_and_excludes_addons():
+    """Test that the snapshot total is kept up to date incrementally."""
+    laptop = Product("MacBook Air M2", price=1450, quantity=10)
+    shipping = AddOns("Standard Shipping", price=10)
+    store = Store([laptop, shipping])
+    assert store.get_total_quantity() == 10
+    store.order([(laptop, 3), (shipping, 1)])
+    assert store.get_total_quantity() == 7
+    store.add_product(Product("iPad Pro", price=1200, quantity=5))
+    assert store.get_total_quantity() == 12
+
+
+def test_removed_product_is_not_in_new_snapshot():
+    """Test that removing a product republishes without it while old snapshots keep it."""
+    store = make_store(5)
+    product = store.products_list[2]
+    before = store.snapshot()
+    store.remove_product(product)
+
+    assert before.get_product(product.product_id).product is product
+    assert store.snapshot().get_product(product.product_id) is None
+    assert len(store.snapshot()) == 4
+
+
+def test_old_versions_are_freed_when_no_reader_holds_them():
+    """Test that superseded snapshots are released once readers drop them."""
+    store = make_store()
+    old = weakref.ref(store.snapshot())
+    store.order([(store.products_list[0], 1)])
+    store.snapshot()
+    gc.collect()
+    assert old() is None
+
+
+def test_readers_never_see_half_applied_orders():
+    """Test that every snapshot taken during concurrent orders has a consistent total."""
+    store = make_store(10)
+    cart = [(product, 1) for product in store.products_list]
+    done = threading.Event()
+    inconsistent = []
+
+    def reader():
+        while not done.is_set():
+            snapshot = store.snapshot()
+            if sum(record.quantity for record in snapshot) % 10:
+                inconsistent.append(snapshot.version)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for _ in range(50):
+        store.order(cart)
+    done.set()
+    thread.join()
+
+    assert inconsistent == []
+    assert store.get_total_quantity() == 0
+
+
+def test_changes_made_through_products_reach_listing_and_totals():
+    """Test that changes made directly to products are published on the next read."""
+    store = make_store(3)
+    first, second, _ = store.products_list
+
+    first.deactivate()
+    second.quantity = 100
+
+    assert first not in store.get_all_products()
+    assert store.get_total_quantity() == 200
+    assert store.snapshot().get_product(second.product_id).quantity == 100
+
+
+def test_reads_during_an_order_see_the_last_published_snapshot():
+    """Test that a read made while an order is being applied, here from a stock alert, sees none of it."""
+    store = make_store(2)
+    first, second = store.products_list
+    totals = []
+    LowStockIndex(on_low_stock=lambda product: totals.append(store.get_total_quantity())).track(first, threshold=45)
+
+    store.order([(first, 10), (second, 10)])
+
+    assert totals == [100]
+    assert store.get_total_quantity() == 80
+
+
+def test_failed_order_publishes_nothing():
+    """Test that an order rejected by a later line leaves the snapshot version alone."""
+    store = make_store(2)
+    first, second = store.products_list
+    version = store.snapshot().version
+
+    with pytest.raises(ValueError, match="Insufficient stock"):
+        store.order([(first, 10), (second, 51)])
+
+    assert store.snapshot().version == version
+    assert first.quantity == 50
+
+
+def test_products_do_not_keep_discarded_stores_alive():
+    """Test that stores built over a product are freed once nothing else uses them."""
+    product = Product("USB Cable", price=5, quantity=10)
+    kept = Store([product])
+    for _ in range(100):
+        Store([product]) + Store([])
+    gc.collect()
+
+    assert list(product._stores) == [kept]
+
+
+def test_reads_and_setters_do_not_wait_for_a_transaction():
+    """Test that reads return the last committed version while an order holds the lock,
+    and that a change made meanwhile is published by the order when it commits."""
+    store = make_store(2)
+    first = store.products_list[0]
+    version = store.snapshot().version
+    holding, release = threading.Event(), threading.Event()
+
+    def writer():
+        with store._transaction():
+            holding.set()
+            release.wait()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    holding.wait()
+    try:
+        first.price = 20
+        during = store.snapshot()
+    finally:
+        release.set()
+        thread.join()
+
+    assert during.version == version
+    assert store.snapshot().get_product(first.product_id).price == 20
@@ -0,0 +1,78 @@
+import pytest
+from products import Product, LimitedProduct
+from promotions import PercentageDiscount, SecondItemHalfPrice
+from quotes import LRUCache
+from store import Store
+
+
+def test_quote_does_not_touch_stock():
+    """Test that quoting a cart prices each line and leaves quantities unchanged."""
+    laptop = Product("MacBook Air M2", price=1000, quantity=10, promotion=SecondItemHalfPrice("Second Half Price!"))
+    mouse_mat = LimitedProduct("Mouse Mat", price=10, quantity=5, purchase_limit=1)
+    store = Store([laptop, mouse_mat])
+
+    quote = store.quote([(laptop, 2), (mouse_mat, 1)])
+    assert [line.price for line in quote.lines] == [1500, 10]
+    assert quote.total_price == 1510
+    assert laptop.quantity == 10
+    assert mouse_mat.quantity == 5
+
+
+def test_repeated_quotes_hit_the_cache():
+    """Test that re-quoting the same cart is served from the cache."""
+    product = Product("Google Pixel 7", price=500, quantity=10)
+    store = Store([product])
+    store.quote([(product, 3)])
+    store.quote([(product, 3)])
+    info = store.quote_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert info.hit_rate == 0.5
+
+
+def test_price_and_promotion_changes_invalidate_cached_quotes():
+    """Test that repricing or changing the promotion of a product is reflected in the next quote."""
+    product = Product("iPad Pro", price=1000, quantity=10)
+    store = Store([product])
+    assert store.quote([(product, 2)]).total_price == 2000
+
+    product.price = 800
+    assert store.quote([(product, 2)]).total_price == 1600
+
+    product.promotion = PercentageDiscount("25% off!", discount_percentage=25)
+    assert store.quote([(product, 2)]).total_price == 1200
+    assert store.quote_cache_info().hits == 0
+
+
+def test_quote_enforces_purchase_limits():
+    """Test that quoting more than a limited product's purchase limit raises an exception."""
+    mouse_mat = LimitedProduct("Mouse Mat", price=10, quantity=5, purchase_limit=1)
+    with pytest.raises(ValueError, match="Cannot purchase more than 1 of this product per order."):
+        Store([mouse_mat]).quote([(mouse_mat, 2)])
+
+
+def test_changing_promotion_or_limit_in_place_invalidates_cached_quotes():
+    """Test that editing the product's promotion object or its purchase limit is reflected in the next quote."""
+    promotion = PercentageDiscount("25% off!", discount_percentage=25)
+    mouse_mat = LimitedProduct("Mouse Mat", price=10, quantity=5, purchase_limit=2)
+    mouse_mat.promotion = promotion
+    store = Store([mouse_mat])
+    assert store.quote([(mouse_mat, 2)]).total_price == 15
+
+    promotion.discount_percentage = 50
+    assert store.quote([(mouse_mat, 2)]).total_price == 10
+
+    mouse_mat.purchase_limit = 1
+    with pytest.raises(ValueError, match="Cannot purchase more than 1 of this product per order."):
+        store.quote([(mouse_mat, 2)])
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    """Test that the cache stays bounded and evicts the least recently used key."""
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert len(cache) == 2
@@ -0,0 +1,140 @@
+import multiprocessing
+
+import pytest
+from products import Product, NonStockedProduct
+from shared_inventory import SharedStockPool
+from stock_alerts import LowStockIndex
+from store import Store
+
+START_METHODS = [method for method in ("fork", "spawn") if method in multiprocessing.get_all_start_methods()]
+
+
+def checkout_worker(product_list, sold):
+    """Keeps ordering small quantities until every product is sold out, then reports the units it sold."""
+    store = Store(product_list)
+    units = attempts = 0
+    while any(product.active for product in product_list):
+        for product in product_list:
+            quantity = 1 + attempts % 3
+            attempts += 1
+            try:
+                store.order([(product, quantity)])
+                units += quantity
+            except Exception:
+                pass
+    sold.put(units)
+
+
+def test_bound_product_reads_and_writes_shared_stock():
+    """Test that a bound product keeps working like a normal product."""
+    with SharedStockPool(capacity=4) as pool:
+        product = Product("MacBook Air M2", price=1450, quantity=10)
+        pool.bind(product)
+        assert product.buy(4) == 5800
+        assert product.quantity == 6
+        product.quantity = 0
+        assert product.active is False
+        product.quantity = 3
+        product.deactivate()
+        with pytest.raises(Exception, match="Cannot buy this product because it is inactive."):
+            product.buy(1)
+        pool.unbind(product)
+        assert (product.quantity, product.active) == (3, False)
+
+
+def test_bind_rejects_unsupported_products():
+    """Test that only stocked, single-pool products can be bound, up to the pool capacity."""
+    with SharedStockPool(capacity=1) as pool:
+        with pytest.raises(ValueError, match="Only stocked products can use shared stock."):
+            pool.bind(NonStockedProduct("Windows License", price=125))
+        with pytest.raises(ValueError, match="Products stocked by location cannot use shared stock."):
+            pool.bind(Product("iPad Pro", price=1200, quantity=2, locations={"Berlin": 2}))
+        pool.bind(Product("Google Pixel 7", price=500, quantity=2))
+        with pytest.raises(ValueError, match="The shared stock pool is full."):
+            pool.bind(Product("Dell XPS 13", price=1400, quantity=2))
+
+
+def test_try_add_never_takes_stock_below_zero():
+    """Test that a negative change larger than the stock fails and leaves the slot unchanged."""
+    with SharedStockPool(capacity=1) as pool:
+        product = Product("Google Pixel 7", price=500, quantity=3)
+        pool.bind(product)
+        assert pool.try_add(product._stock_slot, -5) is False
+        assert (product.quantity, product.active) == (3, True)
+        assert pool.try_add(product._stock_slot, -3) is True
+        assert (product.quantity, product.active) == (0, False)
+        pool.unbind(product)
+
+
+def test_refresh_feeds_worker_sales_to_low_stock_alerts():
+    """Test that a sale made outside this process fires the low-stock alert once the store refreshes."""
+    alerts = []
+    index = LowStockIndex(on_low_stock=alerts.append)
+    with SharedStockPool(capacity=1) as pool:
+        product = Product("Google Pixel 7", price=500, quantity=10)
+        pool.bind(product)
+        index.track(product, threshold=5)
+        store = Store([product])
+        # Writing the slot directly is what a checkout worker's sale looks like to this process.
+        assert pool.try_add(product._stock_slot, -8) is True
+        assert alerts == []
+        assert store.refresh_shared_stock() == 1
+        assert alerts == [product]
+        assert len(index) == 1
+        assert store.refresh_shared_stock() == 0
+        assert alerts == [product]
+        pool.unbind(product)
+
+
+def test_bulk_update_undoes_shared_stock_when_another_seller_wins():
+    """Test that a bulk stock reduction beaten by a concurrent sale changes nothing."""
+    with SharedStockPool(capacity=2) as pool:
+        laptop = Product("MacBook Air M2", price=1450, quantity=10)
+        phone = Product("Google Pixel 7", price=500, quantity=10)
+        for product in (laptop, phone):
+            pool.bind(product)
+        store = Store([laptop, phone])
+        check_phone = phone._quantity_after
+
+        def sell_after_check(delta):
+            """Checks the change, then lets another seller take most of the stock before it is applied."""
+            quantity = check_phone(delta)
+            pool.try_decrement(phone._stock_slot, 8)
+            return quantity
+
+        phone._quantity_after = sell_after_check
+        with pytest.raises(ValueError, match="The quantity must be non-negative."):
+            store.bulk_update(prices={laptop: 1000}, quantity_deltas={laptop: -5, phone: -5})
+
+        assert (laptop.quantity, phone.quantity, laptop.price) == (10, 2, 1450)
+        for product in (laptop, phone):
+            pool.unbind(product)
+
+
+@pytest.mark.parametrize("start_method", START_METHODS)
+def test_concurrent_workers_never_oversell(start_method):
+    """Test that checkout workers in several processes sell exactly the shared stock, never more."""
+    ctx = multiprocessing.get_context(start_method)
+    with SharedStockPool(capacity=8, lock_stripes=2, ctx=ctx) as pool:
+        product_list = [Product(f"Product {idx}", price=10, quantity=500) for idx in range(4)]
+        for product in product_list:
+            pool.bind(product)
+        store = Store(product_list)
+        assert store.get_total_quantity() == 2000
+
+        sold = ctx.Queue()
+        workers = [ctx.Process(target=checkout_worker, args=(product_list, sold)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        results = [sold.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        assert sum(results) == 2000
+        assert all(product.quantity == 0 and not product.active for product in product_list)
+        assert store.get_total_quantity() == 2000
+        assert store.refresh_shared_stock() == 4
+        assert store.get_total_quantity() == 0
+        assert store.get_all_products() == []
+        for product in product_list:
+            pool.unbind(product)
@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+from products import Product, NonStockedProduct
+from stock_alerts import LowStockIndex
+from store import Store
+
+
+def test_buying_below_threshold_fires_callback_once():
+    """Test that crossing the threshold fires the low-stock callback exactly once."""
+    alerts = []
+    index = LowStockIndex(on_low_stock=alerts.append)
+    product = Product("MacBook Air M2", price=1450, quantity=10)
+    index.track(product, threshold=5)
+
+    product.buy(4)
+    assert alerts == []
+    product.buy(2)
+    product.buy(1)
+    assert alerts == [product]
+    assert index.below_threshold() == [product]
+
+
+def test_restocking_clears_product_and_rearms_callback():
+    """Test that restocking removes the product from the index so the next crossing fires again."""
+    alerts = []
+    restocked = []
+    index = LowStockIndex(on_low_stock=alerts.append, on_restocked=restocked.append)
+    product = Product("Google Pixel 7", price=500, quantity=3)
+    index.track(product, threshold=5)
+    assert alerts == [product]
+
+    product.quantity = 20
+    assert restocked == [product]
+    assert product not in index
+
+    product.quantity = 1
+    assert alerts == [product, product]
+
+
+def test_changing_threshold_reevaluates_product():
+    """Test that raising the reorder threshold can put a product below it."""
+    index = LowStockIndex()
+    product = Product("iPad Pro", price=1200, quantity=8)
+    index.track(product, threshold=2)
+    assert len(index) == 0
+
+    product.reorder_threshold = 10
+    assert index.below_threshold() == [product]
+
+
+def test_disabling_threshold_clears_product_without_restock_alert():
+    """Test that removing the reorder threshold drops a low product silently."""
+    restocked = []
+    index = LowStockIndex(on_restocked=restocked.append)
+    product = Product("iPad Pro", price=1200, quantity=1)
+    index.track(product, threshold=5)
+
+    product.reorder_threshold = None
+    assert product not in index
+    assert restocked == []
+
+
+def test_tracking_non_stocked_product_raises_exception():
+    """Test that only stocked products can be tracked."""
+    with pytest.raises(ValueError, match="Only stocked products can have a reorder threshold."):
+        LowStockIndex().track(NonStockedProduct("Windows License", price=125), threshold=1)
+
+
+def test_failing_callback_does_not_fail_or_undo_a_purchase(caplog):
+    """Test that an order still completes, and later callbacks still run, when an alert handler raises."""
+    def broken_handler(product):
+        raise RuntimeError("alerting is down")
+
+    alerts = []
+    index = LowStockIndex(on_low_stock=broken_handler)
+    index.subscribe(on_low_stock=alerts.append)
+    cable = Product("USB Cable", price=5, quantity=10)
+    charger = Product("USB Charger", price=20, quantity=10)
+    index.track(charger, threshold=5)
+
+    assert Store([cable, charger]).order([(cable, 2), (charger, 6)]) == 130
+    assert (cable.quantity, charger.quantity) == (8, 4)
+    assert alerts == [charger]
+    assert "alerting is down" in caplog.text
+
+
+def test_concurrent_updates_fire_callback_once():
+    """Test that many threads re-evaluating a product at once produce a single alert."""
+    alerts = []
+    index = LowStockIndex(on_low_stock=alerts.append)
+    product = Product("USB Cable", price=5, quantity=1000)
+    index.track(product, threshold=500)
+    product._quantity = 100  # below the threshold, not yet reported to the index
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(1000):
+            index.update(product)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert alerts == [product]
+
+
+def test_concurrent_crossings_are_delivered_in_order():
+    """Test that low-stock and restock alerts alternate even when threads keep crossing the threshold."""
+    events = []
+    index = LowStockIndex(on_low_stock=lambda product: events.append("low"),
+                          on_restocked=lambda product: events.append("restocked"))
+    product = Product("HDMI Cable", price=10, quantity=100)
+    index.track(product, threshold=5)
+    barrier = threading.Barrier(4)
+
+    def worker(quantities):
+        barrier.wait()
+        for _ in range(500):
+            for quantity in quantities:
+                product.quantity = quantity
+
+    threads = [threading.Thread(target=worker, args=((1, 50),)) for _ in range(2)]
+    threads += [threading.Thread(target=worker, args=((50, 1),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert events
+    assert events[::2] == ["low"] * len(events[::2])
+    assert events[1::2] == ["restocked"] * len(events[1::2])
+    assert (events[-1] == "low") == (product in index)
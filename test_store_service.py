@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+from products import Product, NonStockedProduct
+from store import Store
+from store_service import StoreService
+
+
+async def send(reader, writer, method, path, payload=None, connection="keep-alive"):
+    """Sends one request on an open connection and returns the status and decoded JSON body."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: {connection}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+def run_against_service(store_obj, scenario):
+    """Starts a service on a free port, runs the scenario with a connection to it, then shuts it down."""
+    async def runner():
+        service = await StoreService(store_obj, port=0, max_workers=2).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+        try:
+            return await scenario(reader, writer)
+        finally:
+            writer.close()
+            await service.close()
+
+    return asyncio.run(runner())
+
+
+def test_listing_is_paginated_over_one_keep_alive_connection():
+    """Test that listing pages through active products and reuses the connection."""
+    product_list = [Product(f"Product {idx}", price=10, quantity=5) for idx in range(5)]
+
+    async def scenario(reader, writer):
+        first = await send(reader, writer, "GET", "/products?limit=2")
+        last = await send(reader, writer, "GET", "/products?offset=4&limit=2")
+        return first, last
+
+    (status, first), (_, last) = run_against_service(Store(product_list), scenario)
+    assert status == 200
+    assert [p["name"] for p in first["products"]] == ["Product 0", "Product 1"]
+    assert first["total"] == 5
+    assert [p["name"] for p in last["products"]] == ["Product 4"]
+
+
+def test_product_lookup():
+    """Test looking up products by id, including an unknown id."""
+    product = Product("MacBook Air M2", price=1450, quantity=100)
+
+    async def scenario(reader, writer):
+        found = await send(reader, writer, "GET", f"/products/{product.product_id}")
+        missing = await send(reader, writer, "GET", "/products/999999999")
+        return found, missing
+
+    (status, found), (missing_status, _) = run_against_service(Store([product]), scenario)
+    assert status == 200
+    assert found["name"] == "MacBook Air M2"
+    assert found["quantity"] == 100
+    assert missing_status == 404
+
+
+def test_single_order_updates_stock():
+    """Test that an order returns its price and reduces stock."""
+    product = Product("Google Pixel 7", price=500, quantity=10)
+    license_key = NonStockedProduct("Windows License", price=125)
+    cart = {"items": [{"product_id": product.product_id, "quantity": 2},
+                      {"product_id": license_key.product_id, "quantity": 1}]}
+
+    async def scenario(reader, writer):
+        return await send(reader, writer, "POST", "/orders", cart)
+
+    status, payload = run_against_service(Store([product, license_key]), scenario)
+    assert status == 200
+    assert payload["total_price"] == 1125
+    assert product.quantity == 8
+
+
+def test_batch_order_settles_each_cart_independently():
+    """Test that a failing cart in a batch does not affect the others."""
+    product = Product("iPad Pro", price=1200, quantity=3)
+    cart = {"items": [{"product_id": product.product_id, "quantity": 2}]}
+
+    async def scenario(reader, writer):
+        return await send(reader, writer, "POST", "/orders/batch", {"carts": [cart, cart, {"items": []}]},
+                          connection="close")
+
+    status, payload = run_against_service(Store([product]), scenario)
+    assert status == 200
+    assert [result["ok"] for result in payload["results"]] == [True, False, False]
+    assert payload["results"][1]["status"] == 409
+    assert payload["results"][2]["status"] == 400
+    assert product.quantity == 1
+
+
+def test_failed_cart_leaves_stock_untouched():
+    """Test that a cart with one unfulfillable line buys nothing, alone or in a batch."""
+    keyboard = Product("Keychron K2", price=80, quantity=5)
+    mouse = Product("MX Master 3", price=100, quantity=2)
+    cart = {"items": [{"product_id": keyboard.product_id, "quantity": 1},
+                      {"product_id": mouse.product_id, "quantity": 99}]}
+
+    async def scenario(reader, writer):
+        single = await send(reader, writer, "POST", "/orders", cart)
+        batch = await send(reader, writer, "POST", "/orders/batch", {"carts": [cart]})
+        return single, batch
+
+    (status, _), (_, batch) = run_against_service(Store([keyboard, mouse]), scenario)
+    assert status == 409
+    assert batch["results"][0]["status"] == 409
+    assert keyboard.quantity == 5
+    assert mouse.quantity == 2
+
+
+def test_invalid_quantities_return_bad_request():
+    """Test that zero, negative and boolean quantities are rejected as bad requests."""
+    product = Product("Google Pixel 7", price=500, quantity=10)
+
+    async def scenario(reader, writer):
+        return [(await send(reader, writer, "POST", "/orders",
+                            {"items": [{"product_id": product.product_id, "quantity": quantity}]}))[0]
+                for quantity in (0, -1, True)]
+
+    assert run_against_service(Store([product]), scenario) == [400, 400, 400]
+    assert product.quantity == 10
+
+
+def test_close_shuts_down_idle_keep_alive_connections_quietly():
+    """Test that closing the service ends idle keep-alive connections without reporting errors."""
+    errors = []
+
+    async def runner():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        service = await StoreService(Store([]), port=0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+        status, _ = await send(reader, writer, "GET", "/total")
+        await service.close()
+        closed = await reader.read() == b""
+        writer.close()
+        return status, closed
+
+    assert asyncio.run(runner()) == (200, True)
+    assert errors == []
+
+
+def test_invalid_json_returns_bad_request():
+    """Test that a malformed body is rejected with a 400."""
+    async def scenario(reader, writer):
+        writer.write(b"POST /orders HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+        await writer.drain()
+        return int((await reader.readline()).split()[1])
+
+    assert run_against_service(Store([]), scenario) == 400
+
+
+def test_quote_prices_cart_without_touching_stock():
+    """Test that a quote returns per-line prices and leaves stock alone."""
+    product = Product("Sony WH-1000XM5", price=350, quantity=10)
+    cart = {"items": [{"product_id": product.product_id, "quantity": 2}]}
+
+    async def scenario(reader, writer):
+        return await send(reader, writer, "POST", "/quotes", cart)
+
+    status, payload = run_against_service(Store([product]), scenario)
+    assert status == 200
+    assert payload["lines"] == [{"product_id": product.product_id, "quantity": 2, "price": 700}]
+    assert payload["total_price"] == 700
+    assert product.quantity == 10